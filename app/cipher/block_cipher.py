@@ -70,6 +70,38 @@ class BlockCipher:
         """
         return self._cipher.decrypt(message)
 
+    def encrypt_messages(self, messages):
+        """
+        Encrypting several messages at once. The ciphers work block by block (ECB),
+        so the messages are encrypted as one long message.
+        :param messages: M x blocklength bit array
+        :return: M x blocklength int8 numpy bit array of encrypted messages
+        """
+        if self._key is None:
+            raise NoKeySet("No key has been set")
+
+        messages = self._check_messages(messages)
+
+        return np.array(self._cipher.encrypt(messages.reshape(-1)), dtype=np.int8).reshape(messages.shape)
+
+    def decrypt_messages(self, messages):
+        """
+        Decrypting several messages at once, see encrypt_messages
+        :param messages: M x blocklength bit array of encrypted messages
+        :return: M x blocklength int8 numpy bit array of decrypted messages
+        """
+        messages = self._check_messages(messages)
+
+        return np.array(self._cipher.decrypt(messages.reshape(-1)), dtype=np.int8).reshape(messages.shape)
+
+    def _check_messages(self, messages):
+        messages = np.asarray(messages, dtype=np.int8)
+
+        if messages.ndim != 2 or messages.shape[1] != self._blocklength:
+            raise InvalidCipherBlockLength("Blocklength should be {}".format(self._blocklength))
+
+        return messages
+
 
 if __name__ == '__main__':
     # DES cipher
@@ -24,4 +24,9 @@ class NoKeySet(Exception):
 
 class WrongConfiguration(Exception):
     def __init__(self, code):
-        self.code = code
\ No newline at end of file
+        self.code = code
+
+
+class InvalidPadding(Exception):
+    def __init__(self, code):
+        self.code = code
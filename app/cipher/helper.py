@@ -1,25 +1,15 @@
 """
 Helper functions for encryption
 """
+import numpy as np
 
 
 def bits_to_bytes(bits):
-    bits = map(int, bits)
-    s = ''.join(str(e) for e in bits)
-
-    return int(s, 2).to_bytes(len(s) // 8, byteorder='big')
+    return np.packbits(np.asarray(bits, dtype=np.uint8)).tobytes()
 
 
 def bytes_to_bits(byts):
-    bits = []
-
-    for byte in byts:
-        result = list(bin(byte)[2::])
-        result = list(map(int, result))
-        result = [0] * (8 - len(result)) + result
-        bits = bits + result
-
-    return bits
+    return np.unpackbits(np.frombuffer(bytes(byts), dtype=np.uint8)).tolist()
 
 
 def bits_to_hex(bits):
@@ -32,7 +32,7 @@ class Simon:
         for single_message in split_message:
             hex_message = bits_to_hex(single_message)
             encrypted_hex = self._key.encrypt(hex_message)
-            encrypted_message = encrypted_message + hex_to_bits(encrypted_hex, 64)
+            encrypted_message.extend(hex_to_bits(encrypted_hex, 64))
 
         return encrypted_message
 
@@ -44,6 +44,6 @@ class Simon:
         for single_message in split_message:
             hex_message = bits_to_hex(single_message)
             decrypted_hex = self._key.decrypt(hex_message)
-            decrypted_message = decrypted_message + hex_to_bits(decrypted_hex, 64)
+            decrypted_message.extend(hex_to_bits(decrypted_hex, 64))
 
         return decrypted_message
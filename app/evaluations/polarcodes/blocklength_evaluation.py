@@ -8,6 +8,7 @@ import time
 
 from app.polarcodes.exceptions.exceptions import CouldNotDecodeError
 from app.polarcodes.polarcodes import Polarcodes
+from app.polarcodes.reliability import ReliabilitySequence
 
 # ------------------- Parameters: ---------------------------------------------------
 
@@ -21,6 +22,12 @@ ITERATIONS_PER_BLOCKLENGTH = 100
 
 SIMULATING_TRUE_BEC = False
 
+# Simulating transmissions? (False: analytic error rates only)
+SIMULATE = True
+
+# Plotting the analytic error rate (bhattacharyya parameters) next to the simulated one?
+ANALYTIC_ERROR_RATE = True
+
 # O(N log N) decoder?
 EFFICIENT_DECODER = True
 
@@ -32,6 +39,7 @@ EPSILON = 0.5
 blocklength = MINIMUM_BLOCKLENGTH
 
 count_errors = []
+analytic_errors = []
 encoding_times = []
 decoding_times = []
 blocklengths = []
@@ -39,15 +47,18 @@ blocklengths = []
 n_iterations = 0
 n_errors = 0
 
+# One channel ordering serves all blocklengths
+reliability_sequence = ReliabilitySequence(EPSILON, MAXIMUM_BLOCKLENGTH)
+
 while blocklength <= MAXIMUM_BLOCKLENGTH:
     k_information_bits = round(K_INFORMATION_BITS_RATE * blocklength)
-    polarcoder = Polarcodes(EPSILON, blocklength, k_information_bits)
+    polarcoder = Polarcodes(EPSILON, blocklength, k_information_bits, reliability_sequence=reliability_sequence)
 
     iteration_errors = 0
     added_encoding_time = 0
     added_decoding_time = 0
 
-    for i in range(ITERATIONS_PER_BLOCKLENGTH):
+    for i in range(ITERATIONS_PER_BLOCKLENGTH if SIMULATE else 0):
 
         n_iterations += 1
 
@@ -75,11 +86,14 @@ while blocklength <= MAXIMUM_BLOCKLENGTH:
 
 
 
-    encoding_times.append(added_encoding_time / ITERATIONS_PER_BLOCKLENGTH)
+    # Without simulation there are no error rates and timings to plot
+    if SIMULATE:
+        encoding_times.append(added_encoding_time / ITERATIONS_PER_BLOCKLENGTH)
 
-    decoding_times.append(added_decoding_time / (ITERATIONS_PER_BLOCKLENGTH))
+        decoding_times.append(added_decoding_time / (ITERATIONS_PER_BLOCKLENGTH))
 
-    count_errors.append(iteration_errors / ITERATIONS_PER_BLOCKLENGTH)
+        count_errors.append(iteration_errors / ITERATIONS_PER_BLOCKLENGTH)
+    analytic_errors.append(polarcoder.analytic_block_error_rate().estimate)
     blocklengths.append(blocklength)
     blocklength = blocklength * 2
 
@@ -90,8 +104,12 @@ print("Amount of errors: {}".format(n_errors))
 print("Amount of iterations: {}".format(n_iterations))
 
 plt.figure(1)
-plt.scatter(blocklengths, count_errors)
-plt.plot(blocklengths, count_errors)
+if SIMULATE:
+    plt.scatter(blocklengths, count_errors)
+    plt.plot(blocklengths, count_errors, label='Simulated')
+if ANALYTIC_ERROR_RATE:
+    plt.plot(blocklengths, analytic_errors, linestyle='--', label='Analytic')
+plt.legend()
 plt.xscale('log')
 plt.ylabel('Error rate')
 plt.xlabel('Blocklength')
@@ -99,22 +117,23 @@ plt.title('Average error rate')
 
 
 
-plt.figure(2)
-plt.scatter(blocklengths, encoding_times)
-plt.plot(blocklengths, encoding_times)
-plt.xscale('log')
-plt.ylabel('Average time for encoding')
-plt.xlabel('Blocklength')
-plt.title('Average time for encoding')
+if SIMULATE:
+    plt.figure(2)
+    plt.scatter(blocklengths, encoding_times)
+    plt.plot(blocklengths, encoding_times)
+    plt.xscale('log')
+    plt.ylabel('Average time for encoding')
+    plt.xlabel('Blocklength')
+    plt.title('Average time for encoding')
 
 
-plt.figure(3)
-plt.scatter(blocklengths, decoding_times)
-plt.plot(blocklengths, decoding_times)
-plt.xscale('log')
-plt.ylabel('Average time for decoding')
-plt.xlabel('Blocklength')
-plt.title('Average time for decoding')
+    plt.figure(3)
+    plt.scatter(blocklengths, decoding_times)
+    plt.plot(blocklengths, decoding_times)
+    plt.xscale('log')
+    plt.ylabel('Average time for decoding')
+    plt.xlabel('Blocklength')
+    plt.title('Average time for decoding')
 plt.show()
 
 
@@ -5,13 +5,14 @@ Evaluating different epsilons
 import numpy as np
 import time
 from app.polarcodes.exceptions.exceptions import CouldNotDecodeError
+from app.polarcodes.importance_sampling import estimate_block_error_rate_stratified
 from app.polarcodes.polarcodes import Polarcodes
 import matplotlib.pyplot as plt
 
 
 # ------------------- Parameters: ---------------------------------------------------
 
-BLOCKLENGTH = 128 # Has to be to the power of 2
+BLOCKLENGTH = 128 # Shortened or punctured if not a power of 2
 
 K_INFORMATION_BITS_RATE = 0.5
 
@@ -19,21 +20,31 @@ ITERATIONS_PER_EPSILON = 100
 
 SIMULATING_TRUE_BEC = False
 
+# Simulating transmissions? (False: analytic error rates only)
+SIMULATE = True
+
+# Plotting the analytic error rate (bhattacharyya parameters) next to the simulated one?
+ANALYTIC_ERROR_RATE = True
+
 # O(N log N) decoder?
 EFFICIENT_DECODER = True
 
 # Recunfiguring polarcodes after each change of epsilon?
 RECONFIGURATION_EPSILON = True
 
+# Estimating error rates down to 1e-9 by importance sampling (additionally to counting errors)?
+IMPORTANCE_SAMPLING = False
+IMPORTANCE_SAMPLES_PER_ERASURE_COUNT = 1000
+
 MAX_EPSILON = 1
 EPSIOLON_STEPS = 0.25
 
 # ------------------- Running evaluation: -------------------------------------------
-blocklength = 2
-while blocklength < BLOCKLENGTH:
-    blocklength = blocklength*2
+blocklength = BLOCKLENGTH
 
 count_errors = []
+analytic_errors = []
+estimated_errors = []
 encoding_times = []
 decoding_times = []
 epsilons = []
@@ -53,7 +64,7 @@ while epsilon <= MAX_EPSILON:
     added_encoding_time = 0
     added_decoding_time = 0
 
-    for i in range(ITERATIONS_PER_EPSILON):
+    for i in range(ITERATIONS_PER_EPSILON if SIMULATE else 0):
         n_iterations += 1
 
         # Generating random message
@@ -80,10 +91,17 @@ while epsilon <= MAX_EPSILON:
         end_decode = time.time()
         added_decoding_time += (end_decode - start_decode)
 
-    encoding_times.append(added_encoding_time / ITERATIONS_PER_EPSILON)
-    decoding_times.append(added_decoding_time / (ITERATIONS_PER_EPSILON))
+    # Without simulation there are no error rates and timings to plot
+    if SIMULATE:
+        encoding_times.append(added_encoding_time / ITERATIONS_PER_EPSILON)
+        decoding_times.append(added_decoding_time / (ITERATIONS_PER_EPSILON))
+
+        count_errors.append(iteration_errors / ITERATIONS_PER_EPSILON)
+    analytic_errors.append(polarcoder.analytic_block_error_rate(epsilon).estimate)
 
-    count_errors.append(iteration_errors / ITERATIONS_PER_EPSILON)
+    if IMPORTANCE_SAMPLING:
+        estimate = estimate_block_error_rate_stratified(polarcoder, epsilon, IMPORTANCE_SAMPLES_PER_ERASURE_COUNT)
+        estimated_errors.append(estimate.block_error_rate)
 
     epsilons.append(epsilon)
 
@@ -96,29 +114,42 @@ print("Amount of iterations: {}".format(n_iterations))
 print("Chosen blocklength: {}".format(blocklength))
 
 plt.figure(1)
-plt.scatter(epsilons, count_errors)
-plt.plot(epsilons, count_errors)
+if SIMULATE:
+    plt.scatter(epsilons, count_errors)
+    plt.plot(epsilons, count_errors, label='Simulated')
+if ANALYTIC_ERROR_RATE:
+    plt.plot(epsilons, analytic_errors, linestyle='--', label='Analytic')
+plt.legend()
 plt.ylabel('Error rate')
 plt.xlabel('Epsilon')
 plt.title('Average error rate')
 
 
 
-plt.figure(2)
-plt.scatter(epsilons, encoding_times)
-plt.plot(epsilons, encoding_times)
-plt.ylabel('Average time for encoding')
-plt.xlabel('Epsilon')
-plt.title('Average time for encoding')
+if SIMULATE:
+    plt.figure(2)
+    plt.scatter(epsilons, encoding_times)
+    plt.plot(epsilons, encoding_times)
+    plt.ylabel('Average time for encoding')
+    plt.xlabel('Epsilon')
+    plt.title('Average time for encoding')
 
 
 
-plt.figure(3)
-plt.scatter(epsilons, decoding_times)
-plt.plot(epsilons, decoding_times)
-plt.ylabel('Average time for decoding')
-plt.xlabel('Epsilon')
-plt.title('Average time for decoding')
+    plt.figure(3)
+    plt.scatter(epsilons, decoding_times)
+    plt.plot(epsilons, decoding_times)
+    plt.ylabel('Average time for decoding')
+    plt.xlabel('Epsilon')
+    plt.title('Average time for decoding')
+
+if IMPORTANCE_SAMPLING:
+    plt.figure(4)
+    plt.semilogy(epsilons, estimated_errors, marker='o')
+    plt.ylabel('Estimated error rate')
+    plt.xlabel('Epsilon')
+    plt.title('Error rate (importance sampling)')
+
 plt.show()
 
 
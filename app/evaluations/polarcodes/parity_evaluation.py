@@ -5,6 +5,7 @@ import numpy as np
 import time
 from app.polarcodes.exceptions.exceptions import CouldNotDecodeError
 from app.polarcodes.polarcodes import Polarcodes
+from app.polarcodes.reliability import ReliabilitySequence
 import matplotlib.pyplot as plt
 
 BLOCKLENGTH = 256 # Has to be to the power of 2
@@ -40,10 +41,13 @@ n_errors = 0
 
 k = K_START
 
+# One channel ordering serves all information bitrates
+reliability_sequence = ReliabilitySequence(EPSILON, blocklength)
+
 while k <= MAX_K_RATE:
 
     k_information_bits = round(k * blocklength)
-    polarcoder = Polarcodes(EPSILON, blocklength, k_information_bits)
+    polarcoder = Polarcodes(EPSILON, blocklength, k_information_bits, reliability_sequence=reliability_sequence)
 
     iteration_errors = 0
     added_encoding_time = 0
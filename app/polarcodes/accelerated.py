@@ -0,0 +1,245 @@
+"""
+ Optional accelerated backend for the polar transform, the SC decoder and the
+ channel simulation.
+
+ If Numba is installed, the scalar-heavy loops are compiled. Otherwise every
+ function falls back transparently to the NumPy implementation, with the same
+ results.
+"""
+import numpy as np
+
+from app.polarcodes import bec_simulation
+from app.polarcodes.decoder_compact import decode_output_compact, load_received_output
+from app.polarcodes.encoder import frozen_template, polar_transform as polar_transform_numpy
+from app.polarcodes.exceptions.exceptions import CouldNotDecodeError
+from app.polarcodes.helper import ERASED, bit_reversal_permutation, is_ternary
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+NUMBA_AVAILABLE = njit is not None
+
+
+def polar_transform(u):
+    """
+    In-place polar transform x = u B_N F^(x n), see encoder.polar_transform
+
+    :param u: C-contiguous numpy array (N) or (M x N) of bits, gets overwritten
+    :return: u, now holding the encoded bits
+    """
+    if not NUMBA_AVAILABLE:
+        return polar_transform_numpy(u)
+
+    blocklength = u.shape[-1]
+    assert u.flags.c_contiguous, 'u must be a C-contiguous numpy array'
+
+    _polar_transform_kernel(u.reshape(-1, blocklength), bit_reversal_permutation(blocklength))
+    return u
+
+
+def encode_inputs(inputs, frozen_bits_expanded, information_indices):
+    """
+    Encode several messages at once, see encoder.encode_inputs
+
+    :param inputs: M x K array of messages to transfer
+    :param frozen_bits_expanded: 1 x BLOCKLENGTH vector with the frozen bits at their positions
+    :param information_indices: sorted positions of the information bits
+    :return: M x BLOCKLENGTH array of encoded messages (int8 for compact input bits, float otherwise)
+    """
+    bits_to_combine = np.repeat(frozen_template(frozen_bits_expanded, is_ternary(inputs))[np.newaxis], len(inputs),
+                                axis=0)
+    bits_to_combine[:, information_indices] = inputs
+
+    return polar_transform(bits_to_combine)
+
+
+def decode_output_sc(received_output, workspace):
+    """
+    Decodes message with successive cancellation, see decoder_compact.decode_output_compact
+
+    :param received_output: output to decode (erased bits are NaN)
+    :param workspace: DecoderWorkspace of the code
+    :return: decoded message
+    """
+    if not NUMBA_AVAILABLE:
+        return decode_output_compact(received_output, workspace)
+
+    load_received_output(received_output, workspace)
+
+    decoded = _decode_sc_kernel(workspace.llr_buffer, workspace.partial_sum_buffer, workspace.n_levels,
+                                workspace.information_mask, workspace.frozen_bits_array, workspace.decoded)
+
+    # If we cannot recover (erasure), we stop decoding
+    if not decoded:
+        raise CouldNotDecodeError
+
+    return workspace.decoded[workspace.information_indices].astype(float)
+
+
+def erase(encoded_inputs, masks, out=None):
+    """
+    Erase the masked bits, see bec_simulation.erase
+
+    :param encoded_inputs: numpy array of bits (N or M x N)
+    :param masks: boolean array of the same shape, true for bits to erase
+    :param out: optional C-contiguous array of the same shape to write the result to
+    :return: numpy array with erased bits (int8 with ERASED for compact input bits, float with NaN otherwise)
+    """
+    if not NUMBA_AVAILABLE:
+        return bec_simulation.erase(encoded_inputs, masks, out)
+
+    if out is None:
+        out = np.empty(np.shape(encoded_inputs), dtype=np.int8 if is_ternary(encoded_inputs) else float)
+
+    assert out.flags.c_contiguous, 'out must be a C-contiguous numpy array'
+
+    erased_value = np.nan if out.dtype.kind == 'f' else ERASED
+    _erase_kernel(np.ascontiguousarray(encoded_inputs, dtype=out.dtype).reshape(-1),
+                  np.ascontiguousarray(masks, dtype=bool).reshape(-1), out.reshape(-1), erased_value)
+
+    return out
+
+
+def erase_bits(encoded_input, bits_to_erase):
+    """
+    Erase bits based on boolean list, see bec_simulation.erase_bits
+
+    :param encoded_input: numpy array of bits
+    :param bits_to_erase: list of boolean (same length as input)
+    :return: numpy array with erased bits (NaN)
+    """
+    return erase(encoded_input, np.asarray(bits_to_erase, dtype=bool))
+
+
+def simulate_bec_channel(encoded_input, epsilon, true_random=False, rng=None):
+    """
+    Replaces random bits with NaN values, see bec_simulation.simulate_bec_channel
+
+    :param encoded_input: Numpy array with either 0 or 1
+    :param epsilon: probability of bit erasure
+    :param true_random: if true: every bit gets possibility of epsilon to get erased.
+            if false: guaranteed amount of epsilon % bits erased
+    :param rng: numpy Generator or seed, a shared generator if None
+    :return: Numpy array with erased bits
+    """
+    positions = bec_simulation.erasure_masks(1, len(encoded_input), epsilon, true_random, rng)[0]
+
+    return erase_bits(encoded_input, positions)
+
+
+def simulate_bec_channels(encoded_inputs, epsilon, true_random=False, rng=None, out=None):
+    """
+    Replaces random bits of several blocks with NaN values, see bec_simulation.simulate_bec_channels
+
+    :param encoded_inputs: M x N numpy array with either 0 or 1
+    :param epsilon: probability of bit erasure
+    :param true_random: if true: every bit gets possibility of epsilon to get erased.
+            if false: guaranteed amount of epsilon % bits erased in every block
+    :param rng: numpy Generator or seed, a shared generator if None
+    :param out: optional M x N float array to write the result to
+    :return: M x N numpy array with erased bits
+    """
+    n_blocks, blocklength = np.shape(encoded_inputs)
+
+    return erase(encoded_inputs, bec_simulation.erasure_masks(n_blocks, blocklength, epsilon, true_random, rng), out)
+
+
+def _polar_transform_kernel(blocks, reversed_positions):
+    """
+    Bit-reversal and butterflies of every block, one bit at a time
+    """
+    n_blocks, blocklength = blocks.shape
+    reversed_block = np.empty(blocklength, dtype=blocks.dtype)
+
+    for block in range(n_blocks):
+        for i in range(blocklength):
+            reversed_block[i] = blocks[block, reversed_positions[i]]
+
+        half = 1
+        while half < blocklength:
+            for start in range(0, blocklength, 2 * half):
+                for i in range(start, start + half):
+                    reversed_block[i] = reversed_block[i] != reversed_block[i + half]
+            half *= 2
+
+        for i in range(blocklength):
+            blocks[block, i] = reversed_block[i]
+
+
+def _decode_sc_kernel(llr_buffer, partial_sum_buffer, n_levels, information_mask, frozen_bits, decoded):
+    """
+    Compact SC decoding on the flat per-level buffers of a DecoderWorkspace
+    :return: false if an information bit could not be recovered
+    """
+    blocklength = 1 << n_levels
+
+    for i in range(blocklength):
+        if i == 0:
+            level = n_levels
+        else:
+            # The node whose second half starts at bit i: compute its bit node
+            level = 1
+            while (i >> (level - 1)) & 1 == 0:
+                level += 1
+
+            half = 1 << (level - 1)
+            parent, child = (1 << level) - 1, half - 1
+            for k in range(half):
+                lr = llr_buffer[parent + half + k] + llr_buffer[parent + k] * partial_sum_buffer[parent + k]
+                llr_buffer[child + k] = 1 if lr > 0 else (-1 if lr < 0 else 0)
+            level -= 1
+
+        # Descend to the bit with check nodes
+        while level > 0:
+            half = 1 << (level - 1)
+            parent, child = (1 << level) - 1, half - 1
+            for k in range(half):
+                llr_buffer[child + k] = llr_buffer[parent + k] * llr_buffer[parent + half + k]
+            level -= 1
+
+        if information_mask[i]:
+            if llr_buffer[0] == 0:
+                return False
+            bit = 1 if llr_buffer[0] < 0 else 0
+        else:
+            bit = frozen_bits[i]
+
+        decoded[i] = bit
+        partial_sum_buffer[0] = 1 - 2 * bit
+
+        # Hand the partial sums of every completed node to its parent
+        level = 0
+        j = i
+        while level < n_levels:
+            size = 1 << level
+            child, parent = size - 1, 2 * size - 1
+
+            if j & 1 == 0:
+                for k in range(size):
+                    partial_sum_buffer[parent + k] = partial_sum_buffer[child + k]
+                break
+
+            for k in range(size):
+                partial_sum_buffer[parent + size + k] = partial_sum_buffer[child + k]
+                partial_sum_buffer[parent + k] *= partial_sum_buffer[child + k]
+
+            level += 1
+            j >>= 1
+
+    return True
+
+
+def _erase_kernel(encoded_inputs, masks, out, erased_value):
+    """
+    Copy the bits and erase the masked ones, in a single pass
+    """
+    for i in range(len(encoded_inputs)):
+        out[i] = erased_value if masks[i] else encoded_inputs[i]
+
+
+if NUMBA_AVAILABLE:
+    _polar_transform_kernel = njit(cache=True)(_polar_transform_kernel)
+    _decode_sc_kernel = njit(cache=True)(_decode_sc_kernel)
+    _erase_kernel = njit(cache=True)(_erase_kernel)
@@ -1,12 +1,20 @@
 """
  Simulate a BEC channel by erasing (=> NaN) each component with
  probability EPSILON.
+
+ Erasure patterns are drawn from a NumPy Generator, for a single block or for
+ M blocks at once (M x N boolean masks). Compact int8 codewords are erased
+ with ERASED instead of NaN.
 """
-from random import shuffle, random
 import numpy as np
 
+from app.polarcodes.helper import ERASED, is_ternary
+
+# Generator used if no generator (or seed) is given
+_default_rng = np.random.default_rng()
+
 
-def simulate_bec_channel(encoded_input, epsilon, true_random=False):
+def simulate_bec_channel(encoded_input, epsilon, true_random=False, rng=None):
     """
     Replaces random bits with NaN values
 
@@ -14,21 +22,102 @@ def simulate_bec_channel(encoded_input, epsilon, true_random=False):
     :param epsilon: probability of bit erasure
     :param true_random: if true: every bit gets possibility of epsilon to get erased.
             if false: guaranteed amount of epsilon % bits erased
+    :param rng: numpy Generator or seed, a shared generator if None
 
     :return: Numpy array with erased bits
     """
     length = len(encoded_input)
 
     if true_random:
-        positions = _get_random_erasures(length, epsilon)
+        positions = _get_random_erasures(length, epsilon, rng)
     else:
-        positions = _get_percentage_erasures(length, epsilon)
+        positions = _get_percentage_erasures(length, epsilon, rng)
 
     erased_input = erase_bits(encoded_input, positions)
 
     return erased_input
 
 
+def simulate_bec_channels(encoded_inputs, epsilon, true_random=False, rng=None, out=None):
+    """
+    Replaces random bits of several blocks with NaN values
+
+    :param encoded_inputs: M x N numpy array with either 0 or 1
+    :param epsilon: probability of bit erasure
+    :param true_random: if true: every bit gets possibility of epsilon to get erased.
+            if false: guaranteed amount of epsilon % bits erased in every block
+    :param rng: numpy Generator or seed, a shared generator if None
+    :param out: optional M x N float array to write the result to
+    :return: M x N numpy array with erased bits
+    """
+    n_blocks, blocklength = np.shape(encoded_inputs)
+
+    return erase(encoded_inputs, erasure_masks(n_blocks, blocklength, epsilon, true_random, rng), out)
+
+
+def erasure_masks(n_blocks, blocklength, epsilon, true_random=False, rng=None):
+    """
+    Draws the erasure patterns of several blocks at once
+
+    :param n_blocks: amount of blocks M
+    :param blocklength: amount of bits per block N
+    :param epsilon: probability of bit erasure
+    :param true_random: if true: every bit gets possibility of epsilon to get erased.
+            if false: guaranteed amount of epsilon % bits erased in every block
+    :param rng: numpy Generator or seed, a shared generator if None
+    :return: M x N boolean array, true for erased bits
+    """
+    rng = generator(rng)
+
+    if true_random:
+        return rng.random((n_blocks, blocklength)) < epsilon
+
+    return fixed_weight_masks(n_blocks, blocklength, round(blocklength * epsilon), rng)
+
+
+def fixed_weight_masks(n_blocks, blocklength, n_bits_to_erase, rng=None):
+    """
+    Draws erasure patterns with exactly n_bits_to_erase erased bits per block,
+    uniformly among all of them
+
+    :param n_blocks: amount of blocks M
+    :param blocklength: amount of bits per block N
+    :param n_bits_to_erase: amount of erased bits per block
+    :param rng: numpy Generator or seed, a shared generator if None
+    :return: M x N boolean array, true for erased bits
+    """
+    rng = generator(rng)
+    masks = np.zeros((n_blocks, blocklength), dtype=bool)
+
+    if 0 < n_bits_to_erase < blocklength:
+        # The positions of the n smallest of N random keys are a uniform n-subset
+        keys = rng.random((n_blocks, blocklength))
+        positions = np.argpartition(keys, n_bits_to_erase - 1, axis=1)[:, :n_bits_to_erase]
+        masks[np.arange(n_blocks)[:, np.newaxis], positions] = True
+    elif n_bits_to_erase >= blocklength:
+        masks[...] = True
+
+    return masks
+
+
+def erase(encoded_inputs, masks, out=None):
+    """
+    Erase the masked bits
+
+    :param encoded_inputs: numpy array of bits (N or M x N)
+    :param masks: boolean array of the same shape, true for bits to erase
+    :param out: optional array of the same shape to write the result to
+    :return: numpy array with erased bits (int8 with ERASED for compact input bits, float with NaN otherwise)
+    """
+    if out is None:
+        out = np.empty(np.shape(encoded_inputs), dtype=np.int8 if is_ternary(encoded_inputs) else float)
+
+    np.copyto(out, encoded_inputs, casting='unsafe')
+    np.copyto(out, np.nan if out.dtype.kind == 'f' else ERASED, where=masks)
+
+    return out
+
+
 def erase_bits(encoded_input, bits_to_erase):
     """
     Erase bits based on boolean list
@@ -37,27 +126,23 @@ def erase_bits(encoded_input, bits_to_erase):
     :param bits_to_erase: list of boolean (same length as input)
     :return: numpy array with erased bits (NaN)
     """
-    encoded_input_copy = encoded_input.copy()
-
-    for i in range(len(encoded_input_copy)):
-        if bits_to_erase[i]:
-            encoded_input_copy[i] = np.nan
+    return erase(encoded_input, np.asarray(bits_to_erase, dtype=bool))
 
-    return encoded_input_copy
 
+def generator(rng):
+    """
+    :param rng: numpy Generator or seed, None for the shared generator
+    :return: numpy Generator
+    """
+    if rng is None:
+        return _default_rng
 
-def _get_random_erasures(length, epsilon):
-    erasure_positions = [False] * length
+    return np.random.default_rng(rng)
 
-    for i in range(length):
-        if random() < epsilon:
-            erasure_positions[i] = True
 
-    return erasure_positions
+def _get_random_erasures(length, epsilon, rng=None):
+    return erasure_masks(1, length, epsilon, True, rng)[0]
 
 
-def _get_percentage_erasures(length, epsilon):
-    n_bits_to_erase = round(length * epsilon)
-    erasure_positions = [True] * n_bits_to_erase + [False] * (length - n_bits_to_erase)
-    shuffle(erasure_positions)
-    return erasure_positions
+def _get_percentage_erasures(length, epsilon, rng=None):
+    return erasure_masks(1, length, epsilon, False, rng)[0]
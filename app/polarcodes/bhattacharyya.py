@@ -1,5 +1,7 @@
 import numpy as np
 
+from app.polarcodes.helper import bit_reversal_permutation
+
 
 def compute_bhattacharyya_bec(epsilon, blocklength):
     """
@@ -10,20 +12,44 @@ def compute_bhattacharyya_bec(epsilon, blocklength):
     :param blocklength: Must be a power of 2
     :return: bhattacharyya parameters
     """
-    if blocklength == 1:
-        # Terminate recursion
-        z = np.array([epsilon])
-    else:
-        # Recursively compute bhattacharyya parameters for half the blocklength
-        z_half = compute_bhattacharyya_bec(epsilon, blocklength / 2)
-
-        # Compute odd and even-indices bhattacharyya parameters that we obtain when
-        # performing one more transform
-        z_half_odd = (2 * z_half) - z_half ** 2
-        z_half_even = z_half ** 2
-        z_appended= np.array([z_half_odd, z_half_even])
-
-        # Merge odd and even indices into a 1 x BLOCKLENGTH vector
-        z = np.reshape(z_appended, (1, int(blocklength)), order='F')[0]
-
-    return z
\ No newline at end of file
+    z = np.array([epsilon], dtype=float)
+
+    # One more transform per level: every parameter splits into the parameters
+    # of the odd (2z - z^2) and even (z^2) indices, interleaved
+    while len(z) < blocklength:
+        z_next = np.empty(2 * len(z))
+        z_next[0::2] = (2 * z) - z ** 2
+        z_next[1::2] = z ** 2
+        z = z_next
+
+    return z
+
+
+def compute_bhattacharyya_bec_channels(erasure_probabilities):
+    """
+    Compute the bhattacharyya parameters for the synthetic channels obtained
+    from BEC channels with different erasure probabilities per codeword bit
+    (E.g. 0 for shortened and 1 for punctured bits).
+
+    :param erasure_probabilities: 1 x BLOCKLENGTH vector, erasure rate of every codeword bit
+    :return: bhattacharyya parameters
+    """
+    erasure_probabilities = np.asarray(erasure_probabilities, dtype=float)
+    blocklength = len(erasure_probabilities)
+
+    # Work on z = u F^(x n), the codeword before the bit-reversal, and follow
+    # the SC decoder from the channel to the bits
+    z = erasure_probabilities[bit_reversal_permutation(blocklength)]
+
+    half = blocklength // 2
+    while half >= 1:
+        halves = z.reshape(blocklength // (2 * half), 2, half)
+        first_half, second_half = halves[:, 0, :].copy(), halves[:, 1, :].copy()
+
+        # Check node (first half) and bit node (second half)
+        halves[:, 0, :] = first_half + second_half - first_half * second_half
+        halves[:, 1, :] = first_half * second_half
+
+        half //= 2
+
+    return z
@@ -0,0 +1,57 @@
+"""
+ Analytic block error rate of SC decoding on the BEC.
+
+ The bhattacharyya parameter Z_i of a synthetic BEC channel is its erasure
+ probability, and SC decoding fails iff one of the information bits is
+ erased. So, over the information set A:
+ - lower bound: max Z_i (the least reliable information bit alone)
+ - union bound: min(1, sum Z_i)
+ - estimate: 1 - prod (1 - Z_i), exact if the erasures of the bit channels
+   were independent. Computed as -expm1(sum log1p(-Z_i)), so that rates far
+   below the float resolution of 1 stay accurate.
+"""
+import numpy as np
+
+
+class BlockErrorBounds:
+
+    def __init__(self, lower_bound, estimate, union_bound):
+        """
+        Analytic block error rate
+        :param lower_bound: lower bound of the block error rate
+        :param estimate: estimated block error rate
+        :param union_bound: upper bound of the block error rate
+        """
+        self._lower_bound = lower_bound
+        self._estimate = estimate
+        self._union_bound = union_bound
+
+    @property
+    def lower_bound(self):
+        return self._lower_bound
+
+    @property
+    def estimate(self):
+        return self._estimate
+
+    @property
+    def union_bound(self):
+        return self._union_bound
+
+
+def analytic_block_error_rate(z_parameters, information_indices):
+    """
+    Block error rate of SC decoding from the bhattacharyya parameters
+    :param z_parameters: 1 x BLOCKLENGTH vector of bhattacharyya parameters (erasure probabilities)
+    :param information_indices: positions A of the information bits
+    :return: BlockErrorBounds
+    """
+    z_information = np.clip(np.asarray(z_parameters, dtype=float)[information_indices], 0., 1.)
+
+    if len(z_information) == 0:
+        return BlockErrorBounds(0., 0., 0.)
+
+    with np.errstate(divide='ignore'):
+        estimate = -np.expm1(np.sum(np.log1p(-z_information)))
+
+    return BlockErrorBounds(float(z_information.max()), float(estimate), float(min(1., z_information.sum())))
@@ -14,8 +14,6 @@ def find_good_channels(z, k, blocklength):
     sorted_indices = np.argsort(z)
 
     A = np.zeros(blocklength)
+    A[sorted_indices[:k]] = 1
 
-    for i in range(k):
-        A[sorted_indices[i]] = 1
-
-    return A
\ No newline at end of file
+    return A
@@ -0,0 +1,187 @@
+"""
+ Erasure channel models. A channel draws the erasure patterns of M blocks of
+ N bits that are transmitted back to back (M x N boolean masks, in the order
+ of the channel uses).
+
+ - BinaryErasureChannel: memoryless, every bit is erased with probability
+   epsilon (see bec_simulation)
+ - GilbertElliottChannel: two-state Markov chain, bits are erased with
+   probability epsilon_good in the good and epsilon_bad in the bad state, so
+   erasures come in bursts
+
+ The Gilbert-Elliott states are generated run by run: the sojourn times of a
+ Markov chain are geometric, so the whole bit stream needs one draw per run
+ instead of one step per bit.
+"""
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from app.polarcodes import bec_simulation
+
+
+class ChannelModel(ABC):
+
+    @abstractmethod
+    def erasure_masks(self, n_blocks, blocklength, rng=None):
+        """
+        Draws the erasure patterns of blocks that are transmitted back to back
+        :param n_blocks: amount of blocks M
+        :param blocklength: amount of bits per block N
+        :param rng: numpy Generator or seed, a shared generator if None
+        :return: M x N boolean array, true for erased bits
+        """
+
+    def simulate(self, encoded_inputs, rng=None, out=None):
+        """
+        Transmits blocks back to back over the channel
+        :param encoded_inputs: M x N numpy array with either 0 or 1
+        :param rng: numpy Generator or seed, a shared generator if None
+        :param out: optional M x N array to write the result to
+        :return: M x N numpy array with erased bits (NaN, or ERASED for compact bits)
+        """
+        n_blocks, blocklength = np.shape(encoded_inputs)
+
+        return bec_simulation.erase(encoded_inputs, self.erasure_masks(n_blocks, blocklength, rng), out)
+
+    @property
+    @abstractmethod
+    def erasure_rate(self):
+        """
+        Average fraction of erased bits
+        """
+
+
+class BinaryErasureChannel(ChannelModel):
+
+    def __init__(self, epsilon, true_random=True):
+        """
+        Memoryless erasure channel
+        :param epsilon: probability of bit erasure
+        :param true_random: if true: every bit gets possibility of epsilon to get erased.
+                if false: guaranteed amount of epsilon % bits erased in every block
+        """
+        assert 0 <= epsilon <= 1, 'epsilon should be between 0 and 1.'
+
+        self._epsilon = epsilon
+        self._true_random = true_random
+
+    def erasure_masks(self, n_blocks, blocklength, rng=None):
+        return bec_simulation.erasure_masks(n_blocks, blocklength, self._epsilon, self._true_random, rng)
+
+    @property
+    def epsilon(self):
+        return self._epsilon
+
+    @property
+    def erasure_rate(self):
+        return self._epsilon
+
+
+class GilbertElliottChannel(ChannelModel):
+
+    def __init__(self, p_good_to_bad, p_bad_to_good, epsilon_good=0., epsilon_bad=1.):
+        """
+        Bursty erasure channel with a good and a bad state (Gilbert-Elliott)
+        :param p_good_to_bad: probability to change from the good to the bad state after a bit
+        :param p_bad_to_good: probability to change from the bad to the good state after a bit
+                (the mean burst length is 1 / p_bad_to_good)
+        :param epsilon_good: probability of bit erasure in the good state
+        :param epsilon_bad: probability of bit erasure in the bad state
+        """
+        assert 0 < p_good_to_bad <= 1 and 0 < p_bad_to_good <= 1, \
+            'transition probabilities should be between 0 (exclusive) and 1.'
+        assert 0 <= epsilon_good <= 1 and 0 <= epsilon_bad <= 1, 'epsilon should be between 0 and 1.'
+
+        self._p_good_to_bad = p_good_to_bad
+        self._p_bad_to_good = p_bad_to_good
+        self._epsilon_good = epsilon_good
+        self._epsilon_bad = epsilon_bad
+
+    @classmethod
+    def from_burst_statistics(cls, erasure_rate, mean_burst_length):
+        """
+        Gilbert channel (every bit erased in the bad state, none in the good state)
+        :param erasure_rate: average fraction of erased bits
+        :param mean_burst_length: average amount of consecutive erased bits
+        :return: GilbertElliottChannel
+        """
+        assert 0 < erasure_rate < 1 and mean_burst_length >= 1, \
+            'erasure rate should be between 0 and 1, bursts at least 1 bit long.'
+
+        p_bad_to_good = 1 / mean_burst_length
+        p_good_to_bad = p_bad_to_good * erasure_rate / (1 - erasure_rate)
+
+        assert p_good_to_bad <= 1, \
+            'bursts of {} bits are too short for an erasure rate of {}.'.format(mean_burst_length, erasure_rate)
+
+        return cls(p_good_to_bad, p_bad_to_good)
+
+    def erasure_masks(self, n_blocks, blocklength, rng=None):
+        rng = bec_simulation.generator(rng)
+        bad = self.states(n_blocks * blocklength, rng)
+
+        if self._epsilon_good == 0. and self._epsilon_bad == 1.:
+            masks = bad
+        else:
+            masks = rng.random(len(bad)) < np.where(bad, self._epsilon_bad, self._epsilon_good)
+
+        return masks.reshape(n_blocks, blocklength)
+
+    def states(self, length, rng=None):
+        """
+        Draws a sequence of channel states, starting in the stationary distribution
+        :param length: amount of bits
+        :param rng: numpy Generator or seed, a shared generator if None
+        :return: boolean array, true for bits sent in the bad state
+        """
+        rng = bec_simulation.generator(rng)
+        first_bad = rng.random() < self.bad_state_probability
+
+        # Runs alternate between the states, a run in the good state ends with
+        # probability p_good_to_bad after every bit (and vice versa)
+        run_lengths = []
+        n_bits = 0
+        mean_run_pair = 1 / self._p_good_to_bad + 1 / self._p_bad_to_good
+
+        while n_bits < length:
+            n_pairs = int((length - n_bits) / mean_run_pair * 1.1) + 16
+            runs = np.empty(2 * n_pairs, dtype=np.int64)
+            runs[0::2] = rng.geometric(self._p_bad_to_good if first_bad else self._p_good_to_bad, n_pairs)
+            runs[1::2] = rng.geometric(self._p_good_to_bad if first_bad else self._p_bad_to_good, n_pairs)
+
+            run_lengths.append(runs)
+            n_bits += int(runs.sum())
+
+        run_lengths = np.concatenate(run_lengths)
+        run_states = np.zeros(len(run_lengths), dtype=bool)
+        run_states[int(not first_bad)::2] = True
+
+        return np.repeat(run_states, run_lengths)[:length]
+
+    @property
+    def bad_state_probability(self):
+        """
+        Stationary probability of the bad state
+        """
+        return self._p_good_to_bad / (self._p_good_to_bad + self._p_bad_to_good)
+
+    @property
+    def erasure_rate(self):
+        bad = self.bad_state_probability
+        return bad * self._epsilon_bad + (1 - bad) * self._epsilon_good
+
+    @property
+    def mean_burst_length(self):
+        """
+        Average amount of consecutive bits sent in the bad state
+        """
+        return 1 / self._p_bad_to_good
+
+    @property
+    def p_good_to_bad(self):
+        return self._p_good_to_bad
+
+    @property
+    def p_bad_to_good(self):
+        return self._p_bad_to_good
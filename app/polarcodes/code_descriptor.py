@@ -0,0 +1,110 @@
+"""
+ Read-only description of a polar code, shared by all coders of the same
+ (epsilon, N, K), including the rate matching to non power of 2 blocklengths.
+
+ None of the arrays is writeable, so one instance can serve any amount of
+ Polarcodes instances and threads. The information set is kept as a boolean
+ mask and index arrays. Two float64 arrays of N entries remain:
+ - z_parameters: the bhattacharyya parameters (for the analytic block error
+   rate), the array of the memoized construction itself, not a copy
+ - frozen_bits_expanded: frozen bits with NaN at the information positions,
+   the interface of the decoders
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from app.polarcodes.construction import construct_code
+from app.polarcodes.encoder import polar_transform
+from app.polarcodes.helper import bit_reversal_permutation, is_power_of_2
+from app.polarcodes.rate_matching import SHORTENING, construct_rate_matched_code, default_rate_matching, \
+    removed_positions
+
+
+class CodeDescriptor:
+    __slots__ = ('epsilon', 'blocklength', 'k_information_bits', 'z_parameters', 'information_mask',
+                 'frozen_bits', 'information_indices', 'frozen_indices', 'frozen_bits_expanded',
+                 'systematic_indices', 'rate_matching', 'transmitted_blocklength', 'transmitted_indices',
+                 'shortened_indices', 'shortened_values', 'punctured_indices')
+
+    def __init__(self, epsilon, z_parameters, information_mask, transmitted_blocklength=None, rate_matching=None):
+        """
+        Derives the masks and index arrays of a code
+        :param epsilon: Erasure rate of BEC the code is constructed for
+        :param z_parameters: 1 x BLOCKLENGTH vector of bhattacharyya parameters
+        :param information_mask: 1 x BLOCKLENGTH vector, true (or 1) for the information bits
+        :param transmitted_blocklength: amount of transmitted bits if the (mother) code is
+                shortened or punctured down to it
+        :param rate_matching: SHORTENING or PUNCTURING, if transmitted_blocklength is below BLOCKLENGTH
+        """
+        self.epsilon = epsilon
+        self.blocklength = len(information_mask)
+        self.z_parameters = z_parameters
+
+        self.information_mask = np.asarray(information_mask) == 1
+        self.k_information_bits = int(np.count_nonzero(self.information_mask))
+
+        # Chose frozen bits
+        self.frozen_bits = np.zeros(self.blocklength - self.k_information_bits, dtype=np.uint8)
+
+        self.information_indices = np.flatnonzero(self.information_mask)
+        self.frozen_indices = np.flatnonzero(~self.information_mask)
+
+        # Frozen bits at their positions A_c, NaN at the information positions
+        self.frozen_bits_expanded = np.full(self.blocklength, np.nan)
+        self.frozen_bits_expanded[self.frozen_indices] = self.frozen_bits
+
+        # Systematic codeword positions of the message: the bit-reversed information positions
+        self.systematic_indices = np.sort(bit_reversal_permutation(self.blocklength)[self.information_indices])
+
+        # Codeword positions that are transmitted, the shortened ones are known to the
+        # decoder (their values only depend on frozen bits), the punctured ones are erased
+        self.rate_matching = rate_matching
+        self.transmitted_blocklength = self.blocklength if transmitted_blocklength is None else transmitted_blocklength
+        self.transmitted_indices = np.arange(self.blocklength)
+        self.shortened_indices = np.array([], dtype=np.intp)
+        self.punctured_indices = np.array([], dtype=np.intp)
+
+        if self.transmitted_blocklength < self.blocklength:
+            removed, _ = removed_positions(self.transmitted_blocklength, rate_matching)
+            self.transmitted_indices = np.setdiff1d(self.transmitted_indices, removed)
+
+            if rate_matching == SHORTENING:
+                self.shortened_indices = removed
+            else:
+                self.punctured_indices = removed
+
+        self.shortened_values = polar_transform(np.nan_to_num(self.frozen_bits_expanded))[self.shortened_indices]
+
+        for array in (self.z_parameters, self.information_mask, self.frozen_bits, self.information_indices,
+                      self.frozen_indices, self.frozen_bits_expanded, self.systematic_indices,
+                      self.transmitted_indices, self.shortened_indices, self.shortened_values, self.punctured_indices):
+            array.flags.writeable = False
+
+    @property
+    def rate_matched(self):
+        return self.transmitted_blocklength < self.blocklength
+
+
+@lru_cache(maxsize=256)
+def code_descriptor(epsilon, blocklength, k_information_bits, rate_matching=None):
+    """
+    Shared descriptor of the code constructed for the BEC
+    :param epsilon: Erasure rate of BEC
+    :param blocklength: amount of transmitted bits, if it is not a power of 2 the next
+            larger code is shortened or punctured
+    :param k_information_bits: amount of Information bits in the Block
+    :param rate_matching: SHORTENING or PUNCTURING, chosen by the rate if None
+    :return: CodeDescriptor
+    """
+    if is_power_of_2(blocklength):
+        z_parameters, a = construct_code(epsilon, blocklength, k_information_bits)
+
+        return CodeDescriptor(epsilon, z_parameters, a)
+
+    if rate_matching is None:
+        rate_matching = default_rate_matching(blocklength, k_information_bits)
+
+    z_parameters, a = construct_rate_matched_code(epsilon, blocklength, k_information_bits, rate_matching)
+
+    return CodeDescriptor(epsilon, z_parameters, a, blocklength, rate_matching)
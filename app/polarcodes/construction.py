@@ -0,0 +1,123 @@
+"""
+ Construct polar codes for the BEC once and reuse the construction.
+
+ Constructions are memoized per process. Optionally they are also stored as
+ .npz files in a cache directory (set with set_cache_directory or the
+ environment variable POLARCODES_CACHE_DIR), so that restarted processes and
+ repeated sweeps load them instead of computing them again.
+
+ The information set is taken from the log-domain ReliabilitySequence, so
+ that codes built with and without a reliability sequence agree where the
+ float64 bhattacharyya parameters tie or saturate.
+"""
+import os
+import tempfile
+from functools import lru_cache
+
+import numpy as np
+
+from app.polarcodes.bhattacharyya import compute_bhattacharyya_bec
+from app.polarcodes.reliability import ReliabilitySequence
+
+CACHE_DIRECTORY_VARIABLE = 'POLARCODES_CACHE_DIR'
+
+# Part of the file names, stored constructions of another version are not loaded
+CACHE_VERSION = 2
+
+_cache_directory = os.environ.get(CACHE_DIRECTORY_VARIABLE)
+
+
+def set_cache_directory(directory):
+    """
+    Sets the directory of the on-disk construction cache, the memoized constructions are dropped
+    :param directory: path of the directory (created if missing), None disables the disk cache
+    """
+    global _cache_directory
+    _cache_directory = directory
+
+    construct_code.cache_clear()
+
+
+def get_cache_directory():
+    """
+    :return: directory of the on-disk construction cache, None if disabled
+    """
+    return _cache_directory
+
+
+@lru_cache(maxsize=256)
+def construct_code(epsilon, blocklength, k_information_bits):
+    """
+    Bhattacharyya parameters and the K best channels of a code
+    :param epsilon: Erasure rate of BEC
+    :param blocklength: Must be a power of 2
+    :param k_information_bits: amount of Information bits in the Block
+    :return: read-only numpy arrays z (bhattacharyya parameters) and A (1 for information bits)
+    """
+    epsilon, blocklength, k_information_bits = float(epsilon), int(blocklength), int(k_information_bits)
+    path = _cache_path(epsilon, blocklength, k_information_bits)
+
+    construction = _load_construction(path, blocklength) if path is not None else None
+
+    if construction is None:
+        z_parameters = compute_bhattacharyya_bec(epsilon, blocklength)
+        a = ReliabilitySequence(epsilon, blocklength).a(blocklength, k_information_bits)
+
+        if path is not None:
+            _store_construction(path, z_parameters, a)
+    else:
+        z_parameters, a = construction
+
+    z_parameters.flags.writeable = False
+    a.flags.writeable = False
+
+    return z_parameters, a
+
+
+def _cache_path(epsilon, blocklength, k_information_bits):
+    """
+    File of a construction in the cache directory, the exact epsilon is encoded in hex
+    """
+    if _cache_directory is None:
+        return None
+
+    return os.path.join(_cache_directory, 'bec_v{}_{}_{}_{}.npz'.format(CACHE_VERSION, epsilon.hex(), blocklength,
+                                                                      k_information_bits))
+
+
+def _load_construction(path, blocklength):
+    """
+    Loads a stored construction, None if it does not exist, is unreadable or has another blocklength
+    """
+    try:
+        with np.load(path) as stored:
+            z_parameters, a = stored['z_parameters'], stored['a']
+    except (OSError, KeyError, ValueError):
+        return None
+
+    if z_parameters.shape != (blocklength,) or a.shape != (blocklength,):
+        return None
+
+    return z_parameters, a
+
+
+def _store_construction(path, z_parameters, a):
+    """
+    Stores a construction atomically, so that concurrent processes never read a partial file
+    """
+    directory = os.path.dirname(path)
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix='.npz.tmp')
+
+        try:
+            with os.fdopen(file_descriptor, 'wb') as file:
+                np.savez(file, z_parameters=z_parameters, a=a)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+    except OSError:
+        # The disk cache is optional, the construction is still memoized
+        pass
@@ -0,0 +1,52 @@
+"""
+ Check whether SC decoding will succeed, without decoding.
+
+ On the BEC the success of SC decoding only depends on the erasure pattern and
+ the positions of the information bits, not on the bit values: the check node
+ of two likelihood ratios is erased if one of them is erased, the bit node
+ only if both of them are erased.
+"""
+import numpy as np
+
+from app.polarcodes.helper import bit_reversal_permutation
+
+
+def propagate_erasures(erasure_masks):
+    """
+    Propagates the erasures through the log2(N) stages of the SC decoder
+    :param erasure_masks: boolean array (N) or (M x N) of erased codeword bits
+    :return: boolean array of the same shape, true if the likelihood ratio of
+             u_i is erased (given that all previous bits are decoded)
+    """
+    erasure_masks = np.asarray(erasure_masks, dtype=bool)
+    blocklength = erasure_masks.shape[-1]
+
+    # Work on z = u F^(x n), the codeword before the bit-reversal
+    erasures = erasure_masks[..., bit_reversal_permutation(blocklength)]
+    blocks = erasures.reshape(-1, blocklength)
+
+    half = blocklength // 2
+    while half >= 1:
+        halves = blocks.reshape(len(blocks), blocklength // (2 * half), 2, half)
+        first_half, second_half = halves[:, :, 0, :], halves[:, :, 1, :]
+
+        # Check node (first half) and bit node (second half)
+        both_erased = first_half & second_half
+        first_half |= second_half
+        second_half[...] = both_erased
+
+        half //= 2
+
+    return erasures
+
+
+def is_decodable(erasure_masks, information_indices):
+    """
+    Checks whether SC decoding succeeds for the erasure patterns
+    :param erasure_masks: boolean array (N) or (M x N) of erased codeword bits
+    :param information_indices: sorted positions A of the information bits
+    :return: boolean (or boolean array with M entries)
+    """
+    erased_channels = propagate_erasures(erasure_masks)[..., information_indices]
+
+    return ~erased_channels.any(axis=-1)
@@ -0,0 +1,75 @@
+"""
+ Decode many received vectors at once with successive cancellation.
+
+ The SC schedule is run a single time for the whole batch, every update of
+ the likelihood ratios is vectorized across the M received vectors (which may
+ have different erasure patterns).
+"""
+import numpy as np
+
+from app.polarcodes.encoder import butterfly_stages
+from app.polarcodes.helper import bit_reversal_permutation, erasure_llrs, is_ternary
+
+
+def decode_outputs_batch(received_outputs, frozen_bits_expanded, information_indices):
+    """
+    Decodes M messages at once
+    -->  Complexity O(N log N), Python overhead once per batch
+    :param received_outputs: M x BLOCKLENGTH array of outputs to decode (erased bits are NaN or ERASED)
+    :param frozen_bits_expanded: 1 x BLOCKLENGTH vector with the frozen bits at positions A_c (NaN elsewhere)
+    :param information_indices: sorted positions A of the information bits
+    :return: M x K array of decoded messages, boolean array with the success of every row
+             (the bits of unsuccessful rows are meaningless)
+    """
+    if not is_ternary(received_outputs):
+        received_outputs = np.asarray(received_outputs, dtype=float)
+    n_outputs, blocklength = received_outputs.shape
+
+    # Decode with the ternary likelihood ratios of z = u F^(x n) (the codeword before the bit-reversal)
+    llrs = erasure_llrs(received_outputs[:, bit_reversal_permutation(blocklength)])
+
+    frozen_bits_expanded = np.asarray(frozen_bits_expanded, dtype=float)
+    n_information_before = np.concatenate([[0], np.cumsum(np.isnan(frozen_bits_expanded))])
+
+    decoded_output = np.zeros((n_outputs, blocklength), dtype=np.int8)
+    success = np.ones(n_outputs, dtype=bool)
+
+    _decode_node(llrs, 0, frozen_bits_expanded, n_information_before, decoded_output, success)
+
+    return decoded_output[:, information_indices].astype(float), success
+
+
+def _decode_node(llrs, start, frozen_bits_expanded, n_information_before, decoded_output, success):
+    """
+    Decodes the bits start ... start + n of all rows (n = width of llrs)
+    :return: the partial sums of the decoded bits (M x n)
+    """
+    n = llrs.shape[1]
+
+    # If all bits are frozen, we dont need to compute anything
+    if n_information_before[start + n] == n_information_before[start]:
+        frozen_bits = frozen_bits_expanded[start:start + n].astype(np.int8)
+        decoded_output[:, start:start + n] = frozen_bits
+        return np.repeat(butterfly_stages(frozen_bits)[np.newaxis], len(llrs), axis=0)
+
+    if n == 1:
+        # Decide according to the lr, an erasure means we cannot recover the row
+        bits = (llrs[:, 0] < 0).astype(np.int8)
+        success &= llrs[:, 0] != 0
+
+        decoded_output[:, start] = bits
+        return bits[:, np.newaxis]
+
+    half = n // 2
+    llrs_first, llrs_second = llrs[:, :half], llrs[:, half:]
+
+    # Odd bits: combine both halves (check node)
+    partial_sums_first = _decode_node(llrs_first * llrs_second, start, frozen_bits_expanded,
+                                      n_information_before, decoded_output, success)
+
+    # Even bits: use the partial sums of the decoded odd bits (bit node)
+    llrs_even = np.sign(llrs_second + llrs_first * (1 - 2 * partial_sums_first)).astype(np.int8)
+    partial_sums_second = _decode_node(llrs_even, start + half, frozen_bits_expanded,
+                                       n_information_before, decoded_output, success)
+
+    return np.concatenate([partial_sums_first ^ partial_sums_second, partial_sums_second], axis=1)
@@ -0,0 +1,162 @@
+"""
+ Decode the received vector with an SC decoder in O(N) memory.
+
+ Instead of a N x (log2 N + 1) table, only the likelihood ratios of the
+ current node of every level are kept (2N in total). The partial sums are
+ updated incrementally in a bit propagation tree, whenever a node of the
+ decoding tree is completed. All buffers live in a reusable workspace, so
+ repeated decodes do not allocate scratch memory. Since the bits are decided
+ in order, the information bits can also be streamed while decoding.
+"""
+import numpy as np
+
+from app.polarcodes.exceptions.exceptions import CouldNotDecodeError
+from app.polarcodes.helper import TERNARY_LLRS, bit_reversal_permutation, is_ternary
+
+
+class DecoderWorkspace:
+
+    def __init__(self, frozen_bits_expanded):
+        """
+        Buffers of the compact SC decoder for one code
+        :param frozen_bits_expanded: 1 x BLOCKLENGTH vector with the frozen bits at positions A_c (NaN elsewhere)
+        """
+        frozen_bits_expanded = np.asarray(frozen_bits_expanded, dtype=float)
+
+        self.blocklength = len(frozen_bits_expanded)
+        self.n_levels = int(np.log2(self.blocklength))
+
+        self.information_indices = np.flatnonzero(np.isnan(frozen_bits_expanded))
+        self.information_mask = np.isnan(frozen_bits_expanded)
+        self.frozen_bits_array = np.nan_to_num(frozen_bits_expanded).astype(np.int8)
+        self.is_information = self.information_mask.tolist()
+        self.frozen_bits = self.frozen_bits_array.tolist()
+        self.reversed_positions = bit_reversal_permutation(self.blocklength)
+
+        # Ternary likelihood ratios (1, -1, 0 = erased) and partial sums as signs
+        # (1 - 2u) of the current node of every level. Level k has 2^k bits and
+        # starts at position 2^k - 1 of the flat buffers
+        self.llr_buffer = np.zeros(2 * self.blocklength - 1, dtype=np.int8)
+        self.partial_sum_buffer = np.ones(2 * self.blocklength - 1, dtype=np.int8)
+        self.llrs = [self.llr_buffer[2 ** level - 1:2 ** (level + 1) - 1] for level in range(self.n_levels + 1)]
+        self.partial_sums = [self.partial_sum_buffer[2 ** level - 1:2 ** (level + 1) - 1]
+                             for level in range(self.n_levels + 1)]
+
+        self.scratch = np.zeros(max(self.blocklength // 2, 1), dtype=np.int8)
+        self.received = np.zeros(self.blocklength)
+        self.erased = np.zeros(self.blocklength, dtype=bool)
+        self.decoded = np.zeros(self.blocklength, dtype=np.int8)
+
+
+def decode_output_compact(received_output, workspace):
+    """
+    Decodes message with per-level likelihood ratios
+    -->  Complexity O(N log N), memory O(N)
+    :param received_output: output to decode (erased bits are NaN)
+    :param workspace: DecoderWorkspace of the code
+    :return: decoded message
+    """
+    for _ in iterate_decoded_bits(received_output, workspace):
+        pass
+
+    return workspace.decoded[workspace.information_indices].astype(float)
+
+
+def iterate_decoded_bits(received_output, workspace):
+    """
+    Decodes message bit by bit, every information bit is yielded as soon as it
+    is decided. Raises CouldNotDecodeError at the first erased information bit
+    (after all bits before it have been yielded).
+    :param received_output: output to decode (erased bits are NaN)
+    :param workspace: DecoderWorkspace of the code, in use until the generator is exhausted
+    :return: generator of the information bits (0 / 1)
+    """
+    n_levels = workspace.n_levels
+    llrs = workspace.llrs
+    partial_sums = workspace.partial_sums
+    scratch = workspace.scratch
+
+    load_received_output(received_output, workspace)
+
+    for i in range(workspace.blocklength):
+        if i == 0:
+            level = n_levels
+        else:
+            # The node whose second half starts at bit i: compute its bit node
+            level = (i & -i).bit_length()
+            half = 2 ** (level - 1)
+            parent_llrs = llrs[level]
+
+            np.multiply(parent_llrs[:half], partial_sums[level][:half], out=scratch[:half])
+            np.add(scratch[:half], parent_llrs[half:], out=scratch[:half])
+            np.sign(scratch[:half], out=llrs[level - 1])
+            level -= 1
+
+        # Descend to the bit with check nodes
+        while level > 0:
+            half = 2 ** (level - 1)
+            np.multiply(llrs[level][:half], llrs[level][half:], out=llrs[level - 1])
+            level -= 1
+
+        if workspace.is_information[i]:
+            lr = llrs[0][0]
+
+            # If we cannot recover (erasure), we stop decoding
+            if lr == 0:
+                raise CouldNotDecodeError
+
+            bit = int(lr < 0)
+        else:
+            bit = workspace.frozen_bits[i]
+
+        workspace.decoded[i] = bit
+        partial_sums[0][0] = 1 - 2 * bit
+
+        _propagate_partial_sums(partial_sums, i, n_levels)
+
+        if workspace.is_information[i]:
+            yield bit
+
+
+def load_received_output(received_output, workspace):
+    """
+    Writes the ternary likelihood ratios of z = u F^(x n) (the codeword before
+    the bit-reversal) into the top level
+    """
+    if is_ternary(received_output):
+        # Compact bits index the likelihood ratios directly
+        np.take(TERNARY_LLRS, np.take(received_output, workspace.reversed_positions),
+                out=workspace.llrs[workspace.n_levels])
+        return
+
+    received = workspace.received
+    np.take(np.asarray(received_output, dtype=float), workspace.reversed_positions, out=received)
+
+    # 0 -> 1, 1 -> -1, erasure -> 0
+    np.isnan(received, out=workspace.erased)
+    np.copyto(received, 0.5, where=workspace.erased)
+    np.multiply(received, -2, out=received)
+    np.add(received, 1, out=received)
+    np.copyto(workspace.llrs[workspace.n_levels], received, casting='unsafe')
+
+
+def _propagate_partial_sums(partial_sums, i, n_levels):
+    """
+    Hands the partial sums of every node completed by bit i to its parent
+    """
+    level = 0
+    while level < n_levels:
+        size = 2 ** level
+
+        if i & 1 == 0:
+            # First child: the parent still waits for its second child
+            partial_sums[level + 1][:size] = partial_sums[level]
+            return
+
+        # Second child: the parent is complete (u_first xor u_second, u_second)
+        parent = partial_sums[level + 1]
+        parent[size:] = partial_sums[level]
+        np.multiply(parent[:size], parent[size:], out=parent[:size])
+
+        level += 1
+        i >>= 1
@@ -8,16 +8,16 @@
 import numpy as np
 
 from app.polarcodes.exceptions.exceptions import CouldNotDecodeError, InvalidCharacterInMessage, UnexpectedLikeliHood
-from app.polarcodes.helper import div
+from app.polarcodes.helper import ERASED, div
 
 
-def decode_output_efficient(received_output, frozen_bits, a):
+def decode_output_efficient(received_output, frozen_bits_expanded, information_indices):
     """
     Decodes message with lookup-tables
     -->  Comploexity O(N Log N)
     :param received_output: received_output: output to decode
-    :param frozen_bits: frozen bits for the BEC channel
-    :param a: position of the frozen bits
+    :param frozen_bits_expanded: 1 x BLOCKLENGTH vector with the frozen bits at positions A_c (NaN elsewhere)
+    :param information_indices: sorted positions A of the information bits
     :return: decoded message
     """
     blocklength = len(received_output)
@@ -25,48 +25,28 @@ def decode_output_efficient(received_output, frozen_bits, a):
     initial_level = 1
     initial_shift_j = 0
 
-    # Put frozen bits in a 1 x BLOCKLENGTH vector, at positions A_c, for easier access
-    frozen_bits_expanded = np.empty(blocklength)
-    frozen_bits_expanded[:] = np.nan
-
-    input_idx = 0
-    for i in range(blocklength):
-        if a[i] == 0:
-            frozen_bits_expanded[i] = frozen_bits[input_idx]
-            input_idx += 1
-
     # Decode bit by bit in an optimized way (reusing previous results)
     l_rs = np.empty((blocklength, int(np.log2(blocklength)+1)))
     l_rs[:] = np.nan
 
-    decoded_output = np.empty(blocklength)
-    decoded_output[:] = np.nan
-
-    for j in range(1, blocklength + 1):
-        if a[j - 1] == 0:
+    # Frozen bits are known from the beginning, we dont need to compute anything for them
+    decoded_output = np.array(frozen_bits_expanded, dtype=float)
 
-            # If the bit is frozen, we dont need to compute anything
-            decoded_output[j - 1] = frozen_bits_expanded[j - 1]
-
-        else:
+    for i in information_indices:
+        j = i + 1
 
-            # To decode, first compute the likelihood ratio using the previously decoded bits
-            l_rs, l = compute_lr(received_output, decoded_output[:j-1], blocklength, j, l_rs, initial_shift_j, initial_level)
+        # To decode, first compute the likelihood ratio using the previously decoded bits
+        l_rs, l = compute_lr(received_output, decoded_output[:j-1], blocklength, j, l_rs, initial_shift_j, initial_level)
 
-            # Then decide according to the lr
-            decoded_output[j - 1] = decide(l)
+        # Then decide according to the lr
+        decoded_output[j - 1] = decide(l)
 
-            # If we cannot recover (erasure), we stop decoding
-            if np.isnan(decoded_output[j - 1]):
-                raise CouldNotDecodeError
+        # If we cannot recover (erasure), we stop decoding
+        if np.isnan(decoded_output[j - 1]):
+            raise CouldNotDecodeError
 
-    decode_index = 0
-    decoded_plain = np.zeros(np.count_nonzero(a))
     # Return the information bits
-    for i in range(blocklength):
-        if a[i] == 1:
-            decoded_plain[decode_index] = decoded_output[i]
-            decode_index += 1
+    decoded_plain = decoded_output[information_indices]
 
     return decoded_plain
 
@@ -97,7 +77,7 @@ def compute_lr(y, u, n, j, lr_s, shift_j, level):
             l = np.inf
         elif y == 1:
             l = 0
-        elif np.isnan(y):
+        elif y == ERASED or np.isnan(y):
             l = 1
         else:
             raise InvalidCharacterInMessage
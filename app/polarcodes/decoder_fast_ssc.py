@@ -0,0 +1,154 @@
+"""
+ Decode the received vector with a Fast-SSC decoder.
+
+ The SC decoding tree is analyzed once: subtrees with only frozen bits (Rate-0),
+ only information bits (Rate-1), repetition codes (REP) and single parity
+ check codes (SPC) are decoded in one vectorized step, instead of recursing
+ down to every single bit. See Sarkis et al. "Fast Polar Decoders".
+"""
+import numpy as np
+
+from app.polarcodes.encoder import butterfly_stages
+from app.polarcodes.exceptions.exceptions import CouldNotDecodeError
+from app.polarcodes.helper import bit_reversal_permutation, erasure_llrs
+
+
+class DecodingNode:
+    RATE_0 = "RATE_0"
+    RATE_1 = "RATE_1"
+    REPETITION = "REPETITION"
+    SINGLE_PARITY_CHECK = "SINGLE_PARITY_CHECK"
+    SPLIT = "SPLIT"
+
+    __slots__ = ('kind', 'start', 'size', 'left', 'right', 'partial_sums')
+
+    def __init__(self, kind, start, size, left=None, right=None, partial_sums=None):
+        """
+        Node of the SC decoding tree
+        :param kind: RATE_0, RATE_1, REPETITION, SINGLE_PARITY_CHECK or SPLIT
+        :param start: position of the first bit of the node
+        :param size: amount of bits of the node
+        :param left: child node of the first half (SPLIT only)
+        :param right: child node of the second half (SPLIT only)
+        :param partial_sums: partial sums of the frozen bits (RATE_0 only)
+        """
+        self.kind = kind
+        self.start = start
+        self.size = size
+        self.left = left
+        self.right = right
+        self.partial_sums = partial_sums
+
+
+def build_decoding_tree(frozen_bits_expanded, start=0, size=None):
+    """
+    Builds the tree of specialized nodes from the frozen bits
+    :param frozen_bits_expanded: 1 x BLOCKLENGTH vector with the frozen bits at positions A_c (NaN elsewhere)
+    :param start: position of the first bit of the subtree
+    :param size: amount of bits of the subtree (BLOCKLENGTH for the root)
+    :return: DecodingNode
+    """
+    frozen_bits_expanded = np.asarray(frozen_bits_expanded, dtype=float)
+    if size is None:
+        size = len(frozen_bits_expanded)
+
+    frozen_bits = frozen_bits_expanded[start:start + size]
+    information = np.isnan(frozen_bits)
+
+    if not information.any():
+        partial_sums = butterfly_stages(frozen_bits.astype(np.int8))
+        return DecodingNode(DecodingNode.RATE_0, start, size, partial_sums=partial_sums)
+
+    if information.all():
+        return DecodingNode(DecodingNode.RATE_1, start, size)
+
+    # Repetition and single parity check codes are only specialized with zero frozen bits
+    zero_frozen = not np.nan_to_num(frozen_bits).any()
+
+    if zero_frozen and information[-1] and not information[:-1].any():
+        return DecodingNode(DecodingNode.REPETITION, start, size)
+
+    if zero_frozen and not information[0] and information[1:].all():
+        return DecodingNode(DecodingNode.SINGLE_PARITY_CHECK, start, size)
+
+    half = size // 2
+    left = build_decoding_tree(frozen_bits_expanded, start, half)
+    right = build_decoding_tree(frozen_bits_expanded, start + half, half)
+
+    return DecodingNode(DecodingNode.SPLIT, start, size, left, right)
+
+
+def decode_output_fast_ssc(received_output, decoding_tree, frozen_bits_expanded, information_indices):
+    """
+    Decodes message with the specialized nodes of the decoding tree
+    :param received_output: output to decode (erased bits are NaN)
+    :param decoding_tree: root DecodingNode, see build_decoding_tree
+    :param frozen_bits_expanded: 1 x BLOCKLENGTH vector with the frozen bits at positions A_c (NaN elsewhere)
+    :param information_indices: sorted positions A of the information bits
+    :return: decoded message
+    """
+    blocklength = len(received_output)
+
+    # Decode with the ternary likelihood ratios of z = u F^(x n) (the codeword before the bit-reversal)
+    llrs = erasure_llrs(np.asarray(received_output)[bit_reversal_permutation(blocklength)])
+
+    decoded_output = np.nan_to_num(np.asarray(frozen_bits_expanded, dtype=float)).astype(np.int8)
+
+    _decode_node(decoding_tree, llrs, decoded_output)
+
+    return decoded_output[information_indices].astype(float)
+
+
+def _decode_node(node, llrs, decoded_output):
+    """
+    Decodes the bits of a node
+    :return: the partial sums of the decoded bits
+    """
+    if node.kind == DecodingNode.RATE_0:
+        return node.partial_sums
+
+    erased = llrs == 0
+
+    if node.kind == DecodingNode.RATE_1:
+        # Every bit carries information, no erasure can be recovered
+        if erased.any():
+            raise CouldNotDecodeError
+
+        partial_sums = (llrs < 0).astype(np.int8)
+        decoded_output[node.start:node.start + node.size] = butterfly_stages(partial_sums.copy())
+
+        return partial_sums
+
+    if node.kind == DecodingNode.REPETITION:
+        # A single received bit is enough
+        received_bits = llrs[~erased]
+        if len(received_bits) == 0:
+            raise CouldNotDecodeError
+
+        bit = int(received_bits[0] < 0)
+        decoded_output[node.start + node.size - 1] = bit
+
+        return np.full(node.size, bit, dtype=np.int8)
+
+    if node.kind == DecodingNode.SINGLE_PARITY_CHECK:
+        # A single erasure is recovered by the even parity
+        if np.count_nonzero(erased) > 1:
+            raise CouldNotDecodeError
+
+        partial_sums = (llrs < 0).astype(np.int8)
+        partial_sums[erased] = partial_sums.sum() % 2
+        decoded_output[node.start:node.start + node.size] = butterfly_stages(partial_sums.copy())
+
+        return partial_sums
+
+    half = node.size // 2
+    llrs_first, llrs_second = llrs[:half], llrs[half:]
+
+    # Odd bits: combine both halves (check node)
+    partial_sums_first = _decode_node(node.left, llrs_first * llrs_second, decoded_output)
+
+    # Even bits: use the partial sums of the decoded odd bits (bit node)
+    llrs_even = np.sign(llrs_second + llrs_first * (1 - 2 * partial_sums_first)).astype(np.int8)
+    partial_sums_second = _decode_node(node.right, llrs_even, decoded_output)
+
+    return np.concatenate([partial_sums_first ^ partial_sums_second, partial_sums_second])
@@ -0,0 +1,81 @@
+"""
+ Decode the received vector with maximum likelihood (ML) on the BEC.
+
+ The unknown information bits are solved from the non-erased codeword bits by
+ Gaussian elimination over GF(2) on the columns of the generator matrix
+ restricted to the information positions. The equations are bit-packed into
+ uint64 words, so one row operation xors 64 unknowns at once.
+"""
+import numpy as np
+
+from app.polarcodes.encoder import polar_transform
+from app.polarcodes.encoder_packed import WORD_SIZE, pack_bits
+from app.polarcodes.exceptions.exceptions import CouldNotDecodeError
+from app.polarcodes.helper import erasure_mask
+
+
+def generator_columns(frozen_bits_expanded, information_indices):
+    """
+    Computes the tables needed by the ML decoder
+    :param frozen_bits_expanded: 1 x BLOCKLENGTH vector with the frozen bits at positions A_c (NaN elsewhere)
+    :param information_indices: sorted positions A of the information bits
+    :return: BLOCKLENGTH x ceil(K / 64) uint64 array (column j of the generator matrix rows A, packed),
+             codeword of the frozen bits alone
+    """
+    blocklength = len(frozen_bits_expanded)
+    k_information_bits = len(information_indices)
+
+    # Rows A of the generator matrix are the encoded unit vectors
+    generator_rows = np.zeros((k_information_bits, blocklength), dtype=np.uint8)
+    generator_rows[np.arange(k_information_bits), information_indices] = 1
+    polar_transform(generator_rows)
+
+    frozen_codeword = np.nan_to_num(np.asarray(frozen_bits_expanded, dtype=float)).astype(np.uint8)
+    polar_transform(frozen_codeword)
+
+    return pack_bits(np.ascontiguousarray(generator_rows.T)), frozen_codeword
+
+
+def decode_output_ml(received_output, generator_columns, frozen_codeword, k_information_bits):
+    """
+    Decodes message by Gauss-Jordan elimination over GF(2)
+    -->  Complexity O(K^2 N / 64)
+    :param received_output: output to decode (erased bits are NaN)
+    :param generator_columns: packed columns of the generator matrix rows A, see generator_columns
+    :param frozen_codeword: codeword of the frozen bits alone
+    :param k_information_bits: amount of information bits K
+    :return: decoded message
+    """
+    received_output = np.asarray(received_output)
+    received_positions = np.flatnonzero(~erasure_mask(received_output))
+
+    # Every received bit is one equation u_A G_A[:, j] = x_j xor (u_Ac G_Ac)[j]
+    equations = generator_columns[received_positions]
+    right_hand_side = received_output[received_positions].astype(np.uint8) ^ frozen_codeword[received_positions]
+
+    if len(received_positions) < k_information_bits:
+        raise CouldNotDecodeError
+
+    for column in range(k_information_bits):
+        word, bit = divmod(column, WORD_SIZE)
+        has_bit = ((equations[:, word] >> np.uint64(bit)) & np.uint64(1)).astype(bool)
+
+        # Find a pivot among the equations which are not used yet
+        candidates = np.flatnonzero(has_bit[column:])
+        if len(candidates) == 0:
+            raise CouldNotDecodeError
+
+        pivot = column + candidates[0]
+        if pivot != column:
+            equations[[column, pivot]] = equations[[pivot, column]]
+            right_hand_side[[column, pivot]] = right_hand_side[[pivot, column]]
+            has_bit[[column, pivot]] = has_bit[[pivot, column]]
+
+        # Eliminate the unknown from all other equations
+        has_bit[column] = False
+        equations[has_bit] ^= equations[column]
+        right_hand_side[has_bit] ^= right_hand_side[column]
+
+    decoded_output = right_hand_side[:k_information_bits].astype(float)
+
+    return decoded_output
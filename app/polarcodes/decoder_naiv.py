@@ -6,59 +6,39 @@
 import numpy as np
 
 from app.polarcodes.exceptions.exceptions import CouldNotDecodeError, InvalidCharacterInMessage, UnexpectedLikeliHood
-from app.polarcodes.helper import div
+from app.polarcodes.helper import ERASED, div
 
 
-def decode_output_naive(received_output, frozen_bits, a):
+def decode_output_naive(received_output, frozen_bits_expanded, information_indices):
     """
     Decodes message without lookup-tables
     -->   Complexity: O(N^2)
     :param received_output: output to decode
-    :param frozen_bits: frozen bits for the BEC channel
-    :param a: position of the frozen bits
+    :param frozen_bits_expanded: 1 x BLOCKLENGTH vector with the frozen bits at positions A_c (NaN elsewhere)
+    :param information_indices: sorted positions A of the information bits
     :return: decoded message
     """
     blocklength = len(received_output)
 
-    # Put frozen bits in a 1 x BLOCKLENGTH vector, at positions A_c for easyier access
-    frozen_bits_expanded = np.empty(blocklength)
-    frozen_bits_expanded[:] = np.nan
+    # Decoding bit by bit (without reusing previous results)
+    # Frozen bits are known from the beginning, we dont need to compute anything for them
+    decoded_output = np.array(frozen_bits_expanded, dtype=float)
 
-    input_idx = 0
-    for i in range(blocklength):
-        if a[i] == 0:
-            frozen_bits_expanded[i] = frozen_bits[input_idx]
-            input_idx += 1
+    for i in information_indices:
+        j = i + 1
 
-    # Decoding bit by bit (without reusing previous results
-    decoded_output = np.empty(blocklength)
-    decoded_output[:] = np.nan
+        # To decode, first compute the likelihood ratio using the previously decoded bits
+        current_lr = compute_lr(received_output, decoded_output[:j-1], blocklength, j)
 
-    for j in range(1, blocklength + 1):
-        if a[j-1] == 0:
+        # Then decide according to the lr
+        decoded_output[j-1] = decide(current_lr)
 
-            # If the bit is frozen, we dont need to compute anything
-            decoded_output[j-1] = frozen_bits_expanded[j-1]
+        # If we cannot recover (erasure), we stop decoding
+        if np.isnan(decoded_output[j-1]):
+            raise CouldNotDecodeError
 
-        else:
-
-            # To decode, first compute the likelihood ratio using the previously decoded bits
-            current_lr = compute_lr(received_output, decoded_output[:j-1], blocklength, j)
-
-            # Then decide according to the lr
-            decoded_output[j-1] = decide(current_lr)
-
-            # If we cannot recover (erasure), we stop decoding
-            if np.isnan(decoded_output[j-1]):
-                raise CouldNotDecodeError
-
-    decode_index = 0
-    decoded_plain = np.zeros(np.count_nonzero(a))
     # Return the information bits
-    for i in range(blocklength):
-        if a[i] == 1:
-            decoded_plain[decode_index] = decoded_output[i]
-            decode_index += 1
+    decoded_plain = decoded_output[information_indices]
 
     return decoded_plain
 
@@ -85,7 +65,7 @@ def compute_lr(y, u, n, j):
             l = np.inf
         elif y == 1:
             l = 0
-        elif np.isnan(y):
+        elif y == ERASED or np.isnan(y):
             l = 1
         else:
             raise InvalidCharacterInMessage
@@ -0,0 +1,142 @@
+"""
+ Decode the received vector as far as possible with SC and find the erased
+ codeword bits whose retransmission unblocks decoding.
+
+ The likelihood ratio of element k of a check node is erased if one of its two
+ inputs is erased, so both of them have to be recovered. A bit node only needs
+ one of its two inputs. This gives the minimal amount of retransmitted bits
+ for every node (sum resp. minimum of the costs of its inputs), which is
+ traced back from the stuck bit to the codeword.
+"""
+import numpy as np
+
+from app.polarcodes.decodability import propagate_erasures
+from app.polarcodes.decoder_compact import DecoderWorkspace, iterate_decoded_bits
+from app.polarcodes.exceptions.exceptions import CouldNotDecodeError
+from app.polarcodes.helper import bit_reversal_permutation, erasure_mask
+
+
+class PartialDecodeResult:
+
+    def __init__(self, decoded_output, stuck_index, retransmission_positions):
+        """
+        Outcome of a partial decode
+        :param decoded_output: the information bits decoded before the stuck bit (all of them if complete)
+        :param stuck_index: position of the first information bit that could not be decoded (None if complete)
+        :param retransmission_positions: sorted codeword positions to retransmit, so that SC decoding succeeds
+        """
+        self._decoded_output = decoded_output
+        self._stuck_index = stuck_index
+        self._retransmission_positions = retransmission_positions
+
+    @property
+    def decoded_output(self):
+        return self._decoded_output
+
+    @property
+    def stuck_index(self):
+        return self._stuck_index
+
+    @property
+    def retransmission_positions(self):
+        return self._retransmission_positions
+
+    @property
+    def complete(self):
+        return self._stuck_index is None
+
+
+def decode_output_partial(received_output, frozen_bits_expanded, information_indices, unavailable_indices=()):
+    """
+    Decodes message with SC until the first erased information bit
+    :param received_output: output to decode (erased bits are NaN)
+    :param frozen_bits_expanded: 1 x BLOCKLENGTH vector with the frozen bits at positions A_c (NaN elsewhere)
+    :param information_indices: sorted positions A of the information bits
+    :param unavailable_indices: erased codeword positions that cannot be retransmitted (E.g. punctured bits)
+    :return: PartialDecodeResult
+    """
+    workspace = DecoderWorkspace(frozen_bits_expanded)
+    decoded_bits = []
+
+    try:
+        for bit in iterate_decoded_bits(received_output, workspace):
+            decoded_bits.append(bit)
+    except CouldNotDecodeError:
+        stuck_index = int(information_indices[len(decoded_bits)])
+        retransmission_positions = find_retransmission_positions(erasure_mask(received_output), information_indices,
+                                                                 unavailable_indices)
+
+        return PartialDecodeResult(np.array(decoded_bits, dtype=float), stuck_index, retransmission_positions)
+
+    return PartialDecodeResult(np.array(decoded_bits, dtype=float), None, np.array([], dtype=int))
+
+
+def find_retransmission_positions(erasure_mask, information_indices, unavailable_indices=()):
+    """
+    Finds erased codeword bits whose retransmission makes SC decoding succeed.
+    Greedy: every stuck information bit (in decoding order) is unblocked with
+    the fewest bits, given the bits chosen for the earlier ones.
+    :param erasure_mask: boolean array of erased codeword bits
+    :param information_indices: sorted positions A of the information bits
+    :param unavailable_indices: erased codeword positions that cannot be retransmitted
+    :return: sorted numpy array of codeword positions
+    """
+    erasure_mask = np.array(erasure_mask, dtype=bool)
+    retransmitted = np.zeros(len(erasure_mask), dtype=bool)
+
+    unavailable = np.zeros(len(erasure_mask), dtype=bool)
+    unavailable[np.asarray(unavailable_indices, dtype=np.intp)] = True
+
+    while True:
+        erased_channels = propagate_erasures(erasure_mask)[information_indices]
+
+        if not erased_channels.any():
+            return np.flatnonzero(retransmitted)
+
+        stuck_index = information_indices[np.argmax(erased_channels)]
+        positions = _unblocking_positions(erasure_mask, unavailable, stuck_index)
+
+        erasure_mask[positions] = False
+        retransmitted[positions] = True
+
+
+def _unblocking_positions(erasure_mask, unavailable, stuck_index):
+    """
+    Fewest erased codeword bits that recover the likelihood ratio of u_stuck_index
+    """
+    blocklength = len(erasure_mask)
+    n_levels = int(np.log2(blocklength))
+    reversed_positions = bit_reversal_permutation(blocklength)
+
+    # Amount of bits to retransmit for every likelihood ratio of the nodes on
+    # the path from the root (z = u F^(x n)) to the stuck bit
+    erased = erasure_mask[reversed_positions]
+    costs = [np.where(erased & unavailable[reversed_positions], np.inf, erased.astype(float))]
+    for level in range(n_levels, 0, -1):
+        half = 2 ** (level - 1)
+        parent = costs[-1]
+
+        if stuck_index & half == 0:
+            costs.append(parent[:half] + parent[half:])
+        else:
+            costs.append(np.minimum(parent[:half], parent[half:]))
+
+    # Trace the choices back from the bit to the codeword
+    needed = np.ones(1, dtype=bool)
+    for level in range(1, n_levels + 1):
+        half = 2 ** (level - 1)
+        parent = costs[n_levels - level]
+        needed_parent = np.zeros(2 * half, dtype=bool)
+
+        if stuck_index & half == 0:
+            needed_parent[:half] = needed
+            needed_parent[half:] = needed
+        else:
+            first_cheaper = parent[:half] <= parent[half:]
+            needed_parent[:half] = needed & first_cheaper
+            needed_parent[half:] = needed & ~first_cheaper
+
+        # Known likelihood ratios need no retransmission
+        needed = needed_parent & (parent > 0)
+
+    return reversed_positions[needed]
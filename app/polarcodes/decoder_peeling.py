@@ -0,0 +1,90 @@
+"""
+ Decode the received vector by peeling (belief propagation on the BEC) over
+ the N log N factor graph of the polar transform.
+
+ Known values are propagated through whole stages of butterflies at once,
+ until no more bits can be recovered. On the BEC this recovers every erasure
+ pattern the SC decoders recover (and more).
+"""
+import numpy as np
+
+from app.polarcodes.exceptions.exceptions import CouldNotDecodeError
+from app.polarcodes.helper import bit_reversal_permutation, check_received_bits, erasure_mask
+
+
+def decode_output_peeling(received_output, frozen_bits_expanded, information_indices):
+    """
+    Decodes message by peeling over the factor graph
+    --> Complexity O(N log N) per sweep
+    :param received_output: output to decode (erased bits are NaN)
+    :param frozen_bits_expanded: 1 x BLOCKLENGTH vector with the frozen bits at positions A_c (NaN elsewhere)
+    :param information_indices: sorted positions A of the information bits
+    :return: decoded message
+    """
+    check_received_bits(received_output)
+
+    blocklength = len(received_output)
+    n_stages = int(np.log2(blocklength))
+
+    # Layer 0 holds u, layer n holds z = u F^(x n), which is the codeword before
+    # the bit-reversal. With the stages in this order the graph follows the SC
+    # recursion (the first split of SC is the stage next to the channel)
+    received_reversed = np.asarray(received_output)[bit_reversal_permutation(blocklength)]
+    frozen_bits_expanded = np.asarray(frozen_bits_expanded, dtype=float)
+
+    values = np.zeros((n_stages + 1, blocklength), dtype=np.uint8)
+    known = np.zeros((n_stages + 1, blocklength), dtype=bool)
+
+    known[0] = ~np.isnan(frozen_bits_expanded)
+    values[0][known[0]] = frozen_bits_expanded[known[0]]
+
+    known[n_stages] = ~erasure_mask(received_reversed)
+    values[n_stages][known[n_stages]] = received_reversed[known[n_stages]]
+
+    n_known = np.count_nonzero(known)
+
+    while not known[0][information_indices].all():
+        # Sweep from the codeword to u and back again
+        for stage in list(range(n_stages - 1, -1, -1)) + list(range(n_stages)):
+            _propagate_stage(values, known, stage)
+
+        previously_known, n_known = n_known, np.count_nonzero(known)
+
+        # If nothing could be recovered anymore, we stop decoding
+        if n_known == previously_known:
+            raise CouldNotDecodeError
+
+    decoded_output = values[0][information_indices].astype(float)
+
+    return decoded_output
+
+
+def _propagate_stage(values, known, stage):
+    """
+    Propagate known values through all N/2 butterflies of a stage at once.
+    Every butterfly connects a, b (layer stage) with c = a xor b, d = b (layer stage + 1).
+    """
+    blocklength = values.shape[1]
+    half = 2 ** stage
+    shape = (blocklength // (2 * half), 2, half)
+
+    values_in, values_out = values[stage].reshape(shape), values[stage + 1].reshape(shape)
+    known_in, known_out = known[stage].reshape(shape), known[stage + 1].reshape(shape)
+
+    va, vb, vc, vd = values_in[:, 0], values_in[:, 1], values_out[:, 0], values_out[:, 1]
+    ka, kb, kc, kd = known_in[:, 0], known_in[:, 1], known_out[:, 0], known_out[:, 1]
+
+    # b and d are the same bit
+    k_bd = kb | kd
+    v_bd = np.where(kb, vb, vd)
+
+    # a xor b xor c = 0: two known bits determine the third one
+    new_ka = ka | (k_bd & kc)
+    new_va = np.where(ka, va, v_bd ^ vc)
+    new_kc = kc | (ka & k_bd)
+    new_vc = np.where(kc, vc, va ^ v_bd)
+    new_v_bd = np.where(k_bd, v_bd, va ^ vc)
+    new_k_bd = k_bd | (ka & kc)
+
+    va[...], vc[...], vb[...], vd[...] = new_va, new_vc, new_v_bd, new_v_bd
+    ka[...], kc[...], kb[...], kd[...] = new_ka, new_kc, new_k_bd, new_k_bd
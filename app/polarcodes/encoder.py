@@ -1,64 +1,156 @@
 import numpy as np
 
+from app.polarcodes.helper import bit_reversal_permutation, is_power_of_2, is_ternary
 
-def encode_input(input, frozen_bits, a, blocklength):
+
+def encode_input(input, frozen_bits_expanded, information_indices):
     """
     Encode the input vector, by adding the frozen bits and performing the
     polar transform.
 
     :param input: the message to transfer
-    :param frozen_bits: the bits which are frozen
-    :param a: positions of the frozen bits
+    :param frozen_bits_expanded: 1 x BLOCKLENGTH vector with the frozen bits at their positions
+    :param information_indices: sorted positions of the information bits
+    :return: the encoded message after polar transform (int8 for compact input bits, float otherwise)
+    """
+    # Scatter the input between the frozen bits
+    bits_to_combine = frozen_template(frozen_bits_expanded, is_ternary(input))
+    bits_to_combine[information_indices] = input
+
+    # Combine the bits using polar transformation
+    encoded_input = polar_transform(bits_to_combine)
+
+    return encoded_input
+
+
+def encode_inputs(inputs, frozen_bits_expanded, information_indices):
+    """
+    Encode several messages at once, by adding the frozen bits and performing
+    the polar transform on all of them in one pass.
+
+    :param inputs: M x K array of messages to transfer
+    :param frozen_bits_expanded: 1 x BLOCKLENGTH vector with the frozen bits at their positions
+    :param information_indices: sorted positions of the information bits
+    :return: M x BLOCKLENGTH array of encoded messages (int8 for compact input bits, float otherwise)
+    """
+    bits_to_combine = np.repeat(frozen_template(frozen_bits_expanded, is_ternary(inputs))[np.newaxis], len(inputs),
+                                axis=0)
+    bits_to_combine[:, information_indices] = inputs
+
+    return polar_transform(bits_to_combine)
+
+
+def encode_input_systematic(input, systematic_indices, blocklength):
+    """
+    Encode the input vector systematically: the message appears verbatim at
+    the codeword positions systematic_indices (the bit-reversed information
+    positions). Requires all frozen bits to be zero and the information set
+    to be domination contiguous, see Arikan "Systematic Polar Coding".
+
+    :param input: the message to transfer
+    :param systematic_indices: sorted codeword positions of the message bits
     :param blocklength: length of block
-    :return: the encoded message after polar transform
+    :return: the encoded message
     """
-    # Concatenate input and frozen bits
-    bits_to_combine = np.zeros(blocklength)
+    return encode_inputs_systematic(np.asarray(input)[np.newaxis], systematic_indices, blocklength)[0]
 
-    input_idx = 0
-    frozen_idx = 0
 
-    for i in range(blocklength):
-        if a[i] == 1:
-            bits_to_combine[i] = input[input_idx]
-            input_idx += 1
-        else:
-            bits_to_combine[i] = frozen_bits[frozen_idx]
-            frozen_idx += 1
+def encode_inputs_systematic(inputs, systematic_indices, blocklength):
+    """
+    Encode several messages systematically at once
 
-    # Recursively combine the bits using polar transformation
-    encoded_input = combine_bits(bits_to_combine, blocklength)
+    :param inputs: M x K array of messages to transfer
+    :param systematic_indices: sorted codeword positions of the message bits
+    :param blocklength: length of block
+    :return: M x BLOCKLENGTH array of encoded messages (int8 for compact input bits, float otherwise)
+    """
+    # v is the bit-reversed input of the butterflies, its frozen part has to be zero
+    frozen_positions = np.ones(blocklength, dtype=bool)
+    frozen_positions[systematic_indices] = False
 
+    v = np.zeros((len(inputs), blocklength), dtype=np.int8 if is_ternary(inputs) else float)
+    v[:, systematic_indices] = inputs
 
-    return encoded_input
+    butterfly_stages(v)
+    v[:, frozen_positions] = 0
+    butterfly_stages(v)
+
+    return v
+
+
+def frozen_template(frozen_bits_expanded, ternary):
+    """
+    Frozen bits to scatter the input into, int8 (compact bits) or float
+    """
+    if ternary:
+        return np.nan_to_num(np.asarray(frozen_bits_expanded, dtype=float)).astype(np.int8)
+
+    return np.array(frozen_bits_expanded, dtype=float)
 
 
 def combine_bits(u, blocklength):
     """
-    Recursively combine the bits using polar transformation
+    Combine the bits using polar transformation
     See Arikan paper figure 3
     :param u: bits to combine
-    :param blocklength: length of the current block
+    :param blocklength: length of the block
     :return: encoded message
     """
-    if blocklength == 1:
-        x = u
-        return x
+    x = np.array(u, dtype=float)
+
+    assert x.shape[-1] == blocklength, 'u should have {} bits.'.format(blocklength)
+
+    return polar_transform(x)
+
+
+def polar_transform(u):
+    """
+    Iterative in-place polar transform x = u B_N F^(x n), without recursion.
+    The reverse shuffles R_N of all levels are applied at once as the
+    bit-reversal permutation B_N, followed by log2(N) butterfly stages.
+    Works on a single block (N) or on a batch of blocks (M x N).
+
+    :param u: C-contiguous numpy array of bits, gets overwritten
+    :return: u, now holding the encoded bits
+    """
+    blocklength = u.shape[-1]
+
+    assert is_power_of_2(blocklength), 'blocklength should be the power of 2 (E.g 8)'
+    assert u.flags.c_contiguous, 'u must be a C-contiguous numpy array'
+
+    # Reverse shuffle operation of all levels (bit-reversal permutation)
+    u[...] = u[..., bit_reversal_permutation(blocklength)]
+
+    return butterfly_stages(u)
+
+
+def butterfly_stages(v):
+    """
+    In-place butterflies x = v F^(x n) (the polar transform without the
+    reverse shuffles). Works on a single block (N) or on a batch of blocks (M x N).
 
-    u_odd = u[::2]
-    u_even = u[1::2]
+    :param v: C-contiguous numpy array of bits, gets overwritten
+    :return: v, now holding the transformed bits
+    """
+    blocklength = v.shape[-1]
 
-    s_odd = np.logical_xor(u_odd, u_even)
-    s_even = u_even
+    assert is_power_of_2(blocklength), 'blocklength should be the power of 2 (E.g 8)'
+    assert v.flags.c_contiguous, 'v must be a C-contiguous numpy array'
 
-    # Reverse shuffle operation R_N
-    v_first_half = s_odd
-    v_second_half = s_even
+    # Integer bits are combined with a bitwise xor, float bits (0. / 1.) logically
+    if v.dtype == bool or np.issubdtype(v.dtype, np.integer):
+        xor = np.bitwise_xor
+    else:
+        xor = np.logical_xor
 
-    # recursevely encode v
-    x_first_half = combine_bits(v_first_half, blocklength / 2)
-    x_second_half = combine_bits(v_second_half, blocklength / 2)
+    blocks = v.reshape(-1, blocklength)
+    half = 1
 
-    x = np.concatenate([x_first_half, x_second_half])
+    while half < blocklength:
+        # Every block of size 2 * half holds one butterfly per position of the first half
+        butterflies = blocks.reshape(len(blocks), blocklength // (2 * half), 2, half)
+        first_half = butterflies[:, :, 0, :]
+        xor(first_half, butterflies[:, :, 1, :], out=first_half)
+        half *= 2
 
-    return x
\ No newline at end of file
+    return v
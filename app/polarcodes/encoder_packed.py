@@ -0,0 +1,147 @@
+"""
+ Encode messages into bit-packed codewords.
+
+ Every codeword is stored in uint64 words (bit i of the block is bit i % 64 of
+ word i // 64), so a 1024 bit codeword takes 128 bytes instead of 8 KB and the
+ polar transform xors 64 bits at once.
+"""
+import numpy as np
+
+from app.polarcodes.helper import bit_reversal_permutation, is_power_of_2
+
+WORD_SIZE = 64
+
+# Masks selecting the lower bit of every butterfly inside a word for the strides 1 ... 32
+_BUTTERFLY_MASKS = {
+    1: np.uint64(0x5555555555555555),
+    2: np.uint64(0x3333333333333333),
+    4: np.uint64(0x0F0F0F0F0F0F0F0F),
+    8: np.uint64(0x00FF00FF00FF00FF),
+    16: np.uint64(0x0000FFFF0000FFFF),
+    32: np.uint64(0x00000000FFFFFFFF),
+}
+
+
+def n_words(blocklength):
+    """
+    Amount of uint64 words needed to store a block
+    """
+    return -(-int(blocklength) // WORD_SIZE)
+
+
+def pack_bits(bits):
+    """
+    Pack bits into uint64 words
+
+    :param bits: array of 0 / 1 with shape (N) or (M x N)
+    :return: uint64 array with shape (ceil(N / 64)) or (M x ceil(N / 64))
+    """
+    bits = np.asarray(bits)
+    blocklength = bits.shape[-1]
+
+    padded = np.zeros(bits.shape[:-1] + (n_words(blocklength) * WORD_SIZE,), dtype=np.uint8)
+    padded[..., :blocklength] = bits
+
+    packed = np.packbits(padded, axis=-1, bitorder='little')
+    return packed.view('<u8').astype(np.uint64, copy=False)
+
+
+def unpack_bits(words, blocklength):
+    """
+    Unpack uint64 words into bits
+
+    :param words: uint64 array with shape (W) or (M x W)
+    :param blocklength: amount of bits in the block
+    :return: uint8 array of 0 / 1 with shape (N) or (M x N)
+    """
+    packed = np.ascontiguousarray(words, dtype='<u8').view(np.uint8)
+    return np.unpackbits(packed, axis=-1, count=blocklength, bitorder='little')
+
+
+def encode_input_packed(input, frozen_bits_expanded, information_indices):
+    """
+    Encode the input vector into a bit-packed codeword
+
+    :param input: the message to transfer
+    :param frozen_bits_expanded: 1 x BLOCKLENGTH vector with the frozen bits at their positions
+    :param information_indices: sorted positions of the information bits
+    :return: uint64 array with the encoded message
+    """
+    return encode_inputs_packed(np.asarray(input)[np.newaxis], frozen_bits_expanded, information_indices)[0]
+
+
+def encode_inputs_packed(inputs, frozen_bits_expanded, information_indices):
+    """
+    Encode several messages into bit-packed codewords at once
+
+    :param inputs: M x K array of messages to transfer
+    :param frozen_bits_expanded: 1 x BLOCKLENGTH vector with the frozen bits at their positions
+    :param information_indices: sorted positions of the information bits
+    :return: M x ceil(BLOCKLENGTH / 64) uint64 array of encoded messages
+    """
+    blocklength = len(frozen_bits_expanded)
+    reversed_positions = bit_reversal_permutation(blocklength)
+
+    # Scatter message and frozen bits directly in bit-reversed order, so that
+    # the packed transform only has to perform the butterflies
+    frozen_template = np.nan_to_num(np.asarray(frozen_bits_expanded, dtype=float)[reversed_positions])
+    bits_to_combine = np.repeat(frozen_template.astype(np.uint8)[np.newaxis], len(inputs), axis=0)
+    bits_to_combine[:, reversed_positions[information_indices]] = inputs
+
+    words = pack_bits(bits_to_combine)
+
+    return polar_transform_packed(words, blocklength)
+
+
+def encode_inputs_packed_systematic(inputs, systematic_indices, blocklength):
+    """
+    Encode several messages systematically into bit-packed codewords at once,
+    see encoder.encode_inputs_systematic
+
+    :param inputs: M x K array of messages to transfer
+    :param systematic_indices: sorted codeword positions of the message bits
+    :param blocklength: length of block
+    :return: M x ceil(BLOCKLENGTH / 64) uint64 array of encoded messages
+    """
+    systematic_bits = np.zeros(blocklength, dtype=np.uint8)
+    systematic_bits[systematic_indices] = 1
+    systematic_words = pack_bits(systematic_bits)
+
+    bits_to_combine = np.zeros((len(inputs), blocklength), dtype=np.uint8)
+    bits_to_combine[:, systematic_indices] = inputs
+
+    words = polar_transform_packed(pack_bits(bits_to_combine), blocklength)
+    words &= systematic_words
+
+    return polar_transform_packed(words, blocklength)
+
+
+def polar_transform_packed(words, blocklength):
+    """
+    In-place butterflies x = v F^(x n) on bit-packed blocks. Strides below 64
+    are shifts and masks inside every word, larger strides xor whole words.
+    The input v has to be given in bit-reversed order (v = u B_N).
+
+    :param words: C-contiguous uint64 array with shape (W) or (M x W), gets overwritten
+    :param blocklength: amount of bits in the block, must be a power of 2
+    :return: words, now holding the encoded bits
+    """
+    assert is_power_of_2(blocklength), 'blocklength should be the power of 2 (E.g 8)'
+    assert words.flags.c_contiguous, 'words must be a C-contiguous numpy array'
+
+    total_words = words.shape[-1]
+    blocks = words.reshape(-1, total_words)
+
+    half = 1
+    while half < min(blocklength, WORD_SIZE):
+        blocks ^= (blocks >> np.uint64(half)) & _BUTTERFLY_MASKS[half]
+        half *= 2
+
+    half_words = 1
+    while half_words < total_words:
+        butterflies = blocks.reshape(len(blocks), total_words // (2 * half_words), 2, half_words)
+        first_half = butterflies[:, :, 0, :]
+        np.bitwise_xor(first_half, butterflies[:, :, 1, :], out=first_half)
+        half_words *= 2
+
+    return words
@@ -12,4 +12,12 @@ class InvalidCharacterInMessage(Exception):
 
 class UnexpectedLikeliHood(Exception):
     "Unexpected likelihood ratio"
-    pass
\ No newline at end of file
+    pass
+
+class InvalidDecoder(Exception):
+    """Raised when an unknown decoder is requested"""
+    pass
+
+class InvalidRateMatching(Exception):
+    """Raised when an unknown rate matching is requested"""
+    pass
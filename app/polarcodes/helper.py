@@ -1,13 +1,171 @@
 """
 Helper Functions for the polar codes
 """
+from functools import lru_cache
+
 import numpy as np
 
+from app.polarcodes.exceptions.exceptions import InvalidCharacterInMessage
+
+# Compact bit representation: int8 with 0, 1 and ERASED (instead of float with NaN)
+ERASED = -1
+
+# Likelihood ratios (as signs) indexed by a compact bit, ERASED picks the last entry
+TERNARY_LLRS = np.array([1, -1, 0], dtype=np.int8)
+TERNARY_LLRS.setflags(write=False)
+
 
 def is_power_of_2(number):
     return number != 0 and ((number & (number - 1)) == 0)
 
 
+@lru_cache(maxsize=None)
+def bit_reversal_permutation(blocklength):
+    """
+    Indices of the bit-reversal permutation B_N (the reverse shuffles R_N of
+    all levels combined). The permutation is its own inverse.
+
+    :param blocklength: Must be a power of 2
+    :return: read-only numpy array of indices
+    """
+    n_bits = int(blocklength).bit_length() - 1
+    indices = np.arange(blocklength)
+    reversed_indices = np.zeros(blocklength, dtype=np.intp)
+
+    for bit in range(n_bits):
+        reversed_indices |= ((indices >> bit) & 1) << (n_bits - 1 - bit)
+
+    reversed_indices.setflags(write=False)
+    return reversed_indices
+
+
+def is_closed_under_domination(indices, blocklength):
+    """
+    Checks whether every index which dominates (has a superset of the binary
+    ones of) an index of the set is in the set as well. Information sets with
+    this property are domination contiguous and allow systematic encoding.
+
+    :param indices: positions of the set
+    :param blocklength: Must be a power of 2
+    :return: boolean
+    """
+    in_set = np.zeros(blocklength, dtype=bool)
+    in_set[indices] = True
+
+    bit = 1
+    while bit < blocklength:
+        members_without_bit = np.flatnonzero(in_set & ((np.arange(blocklength) & bit) == 0))
+        if not in_set[members_without_bit | bit].all():
+            return False
+        bit *= 2
+
+    return True
+
+
+def is_ternary(bits):
+    """
+    Checks whether bits are in the compact representation: int8 numpy arrays
+    with 0, 1 and ERASED, instead of float arrays with NaN erasures. Unsigned
+    arrays (uint8, bool) can't hold ERASED and are no compact bits.
+
+    :param bits: array or list of bits
+    :return: boolean
+    """
+    return isinstance(bits, np.ndarray) and bits.dtype == np.int8
+
+
+def is_unsigned(bits):
+    """
+    Checks whether bits are unsigned (uint8 / bool) numpy arrays, which hold
+    bits without erasures, e.g. unpacked codewords
+
+    :param bits: array or list of bits
+    :return: boolean
+    """
+    return isinstance(bits, np.ndarray) and bits.dtype in (np.uint8, np.bool_)
+
+
+def to_ternary(bits):
+    """
+    Converts bits with erased bits (NaN) into the compact representation.
+    Raises InvalidCharacterInMessage for bits other than 0, 1 or erased.
+
+    :param bits: numpy array of bits with erased bits (NaN), unsigned bits (uint8 / bool)
+            or already compact bits
+    :return: int8 numpy array with 0, 1 and ERASED
+    """
+    check_received_bits(bits)
+
+    if is_ternary(bits) or is_unsigned(bits):
+        return bits.astype(np.int8, copy=False)
+
+    bits = np.asarray(bits, dtype=float)
+    return np.where(np.isnan(bits), ERASED, bits).astype(np.int8)
+
+
+def from_ternary(bits):
+    """
+    Converts bits in the compact representation into floats with erased bits (NaN)
+
+    :param bits: int8 numpy array with 0, 1 and ERASED
+    :return: float numpy array
+    """
+    bits = np.asarray(bits)
+
+    if not is_ternary(bits):
+        return bits.astype(float, copy=False)
+
+    return np.where(bits == ERASED, np.nan, bits)
+
+
+def erasure_mask(bits):
+    """
+    :param bits: bits in either representation (NaN or ERASED for erasures)
+    :return: boolean numpy array, true for erased bits
+    """
+    if is_ternary(bits):
+        return bits == ERASED
+
+    return np.isnan(np.asarray(bits, dtype=float))
+
+
+def check_received_bits(bits):
+    """
+    Raises InvalidCharacterInMessage if a received bit is neither 0, 1 nor erased
+
+    :param bits: bits in either representation (NaN or ERASED for erasures)
+    """
+    if is_ternary(bits):
+        valid = (bits == 0) | (bits == 1) | (bits == ERASED)
+    else:
+        bits = np.asarray(bits, dtype=float)
+        valid = (bits == 0) | (bits == 1) | np.isnan(bits)
+
+    if not valid.all():
+        raise InvalidCharacterInMessage
+
+
+def erasure_llrs(received_output):
+    """
+    Ternary likelihood ratios of received bits on the BEC, stored as signs:
+    1 for a received 0 (L = inf), -1 for a received 1 (L = 0) and 0 for an
+    erasure (L = 1). Check node: l1 * l2, bit node: sign(l2 + l1 * (1 - 2u)).
+
+    :param received_output: numpy array of bits with erased bits (NaN), or compact bits
+    :return: int8 numpy array of the same shape
+    """
+    if is_ternary(received_output):
+        return TERNARY_LLRS[received_output]
+
+    received_output = np.asarray(received_output, dtype=float)
+
+    llrs = np.zeros(received_output.shape, dtype=np.int8)
+    llrs[received_output == 0] = 1
+    llrs[received_output == 1] = -1
+
+    return llrs
+
+
 def div(a, b):
     """
     Simulates Matlab behaviour
@@ -0,0 +1,176 @@
+"""
+ Importance sampling of the block error rate of SC decoding on the BEC, for
+ rates far below what brute force simulation can resolve (1e-6 ... 1e-9).
+
+ Whether SC decoding fails only depends on the erasure pattern, so no message
+ is encoded or decoded: the patterns are checked with
+ Polarcodes.is_decodable_batch.
+
+ - Stratified by the amount w of erasures: BLER = sum_w P(W = w) P(fail | w),
+   W ~ Binomial(N, epsilon). Every stratum is sampled with the same amount of
+   patterns (or enumerated if it is small), instead of spending almost all
+   samples on the likely, but harmless, erasure counts. P(fail | w) = 1 if
+   fewer than K bits are left.
+ - Biased epsilon: the erasures are drawn i.i.d. with a larger erasure
+   probability and every failure is weighted with the likelihood ratio
+   (epsilon / biased)^w ((1 - epsilon) / (1 - biased))^(N - w). The biased
+   erasure rate is the average fraction of erasures of the failing patterns,
+   taken from a small stratified run.
+"""
+from itertools import combinations
+from math import comb, lgamma, log, log1p
+
+import numpy as np
+
+from app.polarcodes import bec_simulation
+
+
+class BlockErrorEstimate:
+
+    def __init__(self, block_error_rate, standard_error, n_decodes):
+        """
+        Estimated block error rate
+        :param block_error_rate: estimated probability that SC decoding fails
+        :param standard_error: estimated standard deviation of the estimate
+        :param n_decodes: amount of checked erasure patterns
+        """
+        self._block_error_rate = block_error_rate
+        self._standard_error = standard_error
+        self._n_decodes = n_decodes
+
+    @property
+    def block_error_rate(self):
+        return self._block_error_rate
+
+    @property
+    def standard_error(self):
+        return self._standard_error
+
+    @property
+    def relative_error(self):
+        if self._block_error_rate == 0:
+            return 0.
+
+        return self._standard_error / self._block_error_rate
+
+    @property
+    def n_decodes(self):
+        return self._n_decodes
+
+
+def estimate_block_error_rate_stratified(polarcoder, epsilon=None, n_samples=1000, max_enumeration=2 ** 14,
+                                         min_probability=1e-30, rng=None):
+    """
+    Block error rate, stratified by the amount of erasures
+    :param polarcoder: Polarcodes instance
+    :param epsilon: Erasure rate of BEC, the one the code is constructed for if None
+    :param n_samples: amount of erasure patterns per amount of erasures
+    :param max_enumeration: amounts of erasures with at most this many patterns are enumerated (exact)
+    :param min_probability: amounts of erasures less likely than this are left out
+    :param rng: numpy Generator or seed, a shared generator if None
+    :return: BlockErrorEstimate
+    """
+    epsilon = polarcoder.epsilon if epsilon is None else epsilon
+    probabilities, failure_rates, variances, n_decodes = _failure_rates_by_erasures(
+        polarcoder, epsilon, n_samples, max_enumeration, min_probability, rng)
+
+    return BlockErrorEstimate(float(probabilities @ failure_rates), float(np.sqrt(probabilities ** 2 @ variances)),
+                              n_decodes)
+
+
+def estimate_block_error_rate_biased(polarcoder, epsilon=None, biased_epsilon=None, n_samples=10000, rng=None):
+    """
+    Block error rate with erasures drawn at a larger erasure rate and reweighted
+    :param polarcoder: Polarcodes instance
+    :param epsilon: Erasure rate of BEC, the one the code is constructed for if None
+    :param biased_epsilon: erasure rate to sample with. If None: the average fraction of
+            erased bits of the failing patterns, from a small stratified run
+    :param n_samples: amount of erasure patterns
+    :param rng: numpy Generator or seed, a shared generator if None
+    :return: BlockErrorEstimate
+    """
+    epsilon = polarcoder.epsilon if epsilon is None else epsilon
+    blocklength = polarcoder.blocklength
+    rng = bec_simulation.generator(rng)
+    n_decodes = n_samples
+
+    if biased_epsilon is None:
+        probabilities, failure_rates, _, n_pilot_decodes = _failure_rates_by_erasures(
+            polarcoder, epsilon, max(n_samples // blocklength, 16), 2 ** 10, 1e-30, rng)
+        failures = probabilities * failure_rates
+        n_decodes += n_pilot_decodes
+
+        biased_epsilon = epsilon
+        if failures.sum() > 0:
+            biased_epsilon = max(epsilon, failures @ np.arange(blocklength + 1) / failures.sum() / blocklength)
+
+    assert 0 < epsilon <= biased_epsilon < 1, 'biased epsilon should be between epsilon and 1.'
+
+    masks = bec_simulation.erasure_masks(n_samples, blocklength, biased_epsilon, True, rng)
+    failures = ~polarcoder.is_decodable_batch(masks)
+
+    # Likelihood ratio of the erasure patterns under epsilon and biased_epsilon
+    n_erased = masks.sum(axis=1)
+    log_weights = n_erased * (log(epsilon) - log(biased_epsilon)) + \
+        (blocklength - n_erased) * (log1p(-epsilon) - log1p(-biased_epsilon))
+    weighted_failures = np.where(failures, np.exp(log_weights), 0.)
+
+    return BlockErrorEstimate(float(weighted_failures.mean()),
+                              float(weighted_failures.std(ddof=1) / np.sqrt(n_samples)), n_decodes)
+
+
+def _failure_rates_by_erasures(polarcoder, epsilon, n_samples, max_enumeration, min_probability, rng):
+    """
+    Probability of every amount w = 0 ... N of erasures and the (estimated) failure rate given w
+    :return: arrays P(W = w), P(fail | w), variances of the estimates of P(fail | w), amount of decodes
+    """
+    blocklength = polarcoder.blocklength
+    k_information_bits = polarcoder.k_information_bits
+    rng = bec_simulation.generator(rng)
+
+    probabilities = np.zeros(blocklength + 1)
+    failure_rates = np.zeros(blocklength + 1)
+    variances = np.zeros(blocklength + 1)
+    n_decodes = 0
+
+    for n_erased in range(blocklength + 1):
+        probability = _binomial_probability(blocklength, n_erased, epsilon)
+
+        if probability < min_probability:
+            continue
+
+        probabilities[n_erased] = probability
+
+        # Fewer than K bits left, no decoder can recover the message
+        if n_erased > blocklength - k_information_bits:
+            failure_rates[n_erased] = 1.
+            continue
+
+        n_patterns = comb(blocklength, n_erased)
+
+        if n_patterns <= max_enumeration:
+            positions = np.array(list(combinations(range(blocklength), n_erased)), dtype=np.intp)
+            masks = np.zeros((n_patterns, blocklength), dtype=bool)
+            masks[np.arange(n_patterns)[:, np.newaxis], positions.reshape(n_patterns, n_erased)] = True
+        else:
+            masks = bec_simulation.fixed_weight_masks(n_samples, blocklength, n_erased, rng)
+
+        failure_rate = 1 - polarcoder.is_decodable_batch(masks).mean()
+
+        failure_rates[n_erased] = failure_rate
+        if n_patterns > max_enumeration:
+            variances[n_erased] = failure_rate * (1 - failure_rate) / n_samples
+
+        n_decodes += len(masks)
+
+    return probabilities, failure_rates, variances, n_decodes
+
+
+def _binomial_probability(n, k, p):
+    """
+    P(W = k) for W ~ Binomial(n, p), computed in the log domain
+    """
+    if p == 0 or p == 1:
+        return float(k == round(n * p))
+
+    return float(np.exp(lgamma(n + 1) - lgamma(k + 1) - lgamma(n - k + 1) + k * log(p) + (n - k) * log1p(-p)))
@@ -0,0 +1,82 @@
+"""
+ Block interleaver: the bits are written row by row into DEPTH rows and read
+ column by column, so that bits that are consecutive on the channel are far
+ apart in the codeword and a burst of erasures is spread over it.
+
+ Interleaving M codewords (M a multiple of DEPTH) spreads each codeword over
+ DEPTH of them: bit n of the r-th codeword of a group is channel use n DEPTH + r.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=64)
+def interleaver_permutation(length, depth):
+    """
+    :param length: amount of bits
+    :param depth: amount of rows
+    :return: read-only permutation, interleaved bit j is bit permutation[j] and its inverse
+    """
+    assert 1 <= depth <= max(length, 1), 'depth should be between 1 and {}.'.format(length)
+
+    n_columns = -(-length // depth)
+    permutation = np.argsort(np.arange(length) % n_columns, kind='stable')
+    inverse = np.argsort(permutation)
+
+    permutation.flags.writeable = False
+    inverse.flags.writeable = False
+
+    return permutation, inverse
+
+
+def interleave(bits, depth):
+    """
+    Interleaves the bits of one or several blocks (along the last axis)
+    :param bits: numpy array of bits (N or M x N)
+    :param depth: amount of rows of the interleaver
+    :return: interleaved bits
+    """
+    bits = np.asarray(bits)
+    return bits[..., interleaver_permutation(bits.shape[-1], depth)[0]]
+
+
+def deinterleave(bits, depth):
+    """
+    Restores the order of interleaved bits, see interleave
+    :param bits: numpy array of interleaved bits (N or M x N)
+    :param depth: amount of rows of the interleaver
+    :return: bits in the original order
+    """
+    bits = np.asarray(bits)
+    return bits[..., interleaver_permutation(bits.shape[-1], depth)[1]]
+
+
+def interleave_blocks(blocks, depth):
+    """
+    Spreads every block over DEPTH consecutive blocks
+    :param blocks: M x N numpy array, M a multiple of depth
+    :param depth: amount of blocks that are interleaved together
+    :return: M x N numpy array in the order of the channel uses
+    """
+    n_blocks, blocklength = np.shape(blocks)
+    assert n_blocks % depth == 0, 'amount of blocks should be a multiple of {}.'.format(depth)
+
+    frames = np.reshape(blocks, (n_blocks // depth, depth * blocklength))
+
+    return interleave(frames, depth).reshape(n_blocks, blocklength)
+
+
+def deinterleave_blocks(blocks, depth):
+    """
+    Restores the blocks from the order of the channel uses, see interleave_blocks
+    :param blocks: M x N numpy array, M a multiple of depth
+    :param depth: amount of blocks that are interleaved together
+    :return: M x N numpy array
+    """
+    n_blocks, blocklength = np.shape(blocks)
+    assert n_blocks % depth == 0, 'amount of blocks should be a multiple of {}.'.format(depth)
+
+    frames = np.reshape(blocks, (n_blocks // depth, depth * blocklength))
+
+    return deinterleave(frames, depth).reshape(n_blocks, blocklength)
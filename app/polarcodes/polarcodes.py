@@ -1,43 +1,129 @@
 """
 A simulation of polar codes (error correction) using a binary erasure channel
 (BEC)
-Two decoder impoemented: A "naiv" one (O(N^2)) and an "efficient" one (O(N log N))
+Two SC decoder impoemented: A "naiv" one (O(N^2)) and an "efficient" one (O(N log N))
+Additionally a peeling decoder over the factor graph
 """
+import threading
+from functools import lru_cache
+
 import numpy as np
 
-from app.polarcodes import bec_simulation
-from app.polarcodes.bhattacharyya import compute_bhattacharyya_bec
-from app.polarcodes.channel_finder import find_good_channels
+from app.polarcodes import accelerated as accelerated_backend, bec_simulation
+from app.polarcodes.bhattacharyya import compute_bhattacharyya_bec_channels
+from app.polarcodes.block_error_rate import analytic_block_error_rate
+from app.polarcodes.decodability import is_decodable
+from app.polarcodes.decoder_batch import decode_outputs_batch
+from app.polarcodes.code_descriptor import CodeDescriptor, code_descriptor
+from app.polarcodes.decoder_compact import DecoderWorkspace, decode_output_compact, iterate_decoded_bits
 from app.polarcodes.decoder_efficient import decode_output_efficient
+from app.polarcodes.decoder_fast_ssc import build_decoding_tree, decode_output_fast_ssc
+from app.polarcodes.decoder_ml import decode_output_ml, generator_columns
 from app.polarcodes.decoder_naiv import decode_output_naive
-from app.polarcodes.encoder import encode_input
-from app.polarcodes.helper import is_power_of_2
+from app.polarcodes.decoder_partial import PartialDecodeResult, decode_output_partial
+from app.polarcodes.decoder_peeling import decode_output_peeling
+from app.polarcodes.encoder import encode_input, encode_input_systematic, encode_inputs, encode_inputs_systematic, \
+    polar_transform
+from app.polarcodes.exceptions.exceptions import InvalidDecoder
+from app.polarcodes.encoder_packed import encode_inputs_packed, encode_inputs_packed_systematic, pack_bits, unpack_bits
+from app.polarcodes.rate_matching import PUNCTURING, SHORTENING
+from app.polarcodes.interleaver import deinterleave_blocks
+from app.polarcodes.helper import ERASED, check_received_bits, erasure_mask, is_closed_under_domination, \
+    is_power_of_2, is_ternary, is_unsigned, to_ternary
 
 
 class Polarcodes:
+    NAIVE = "NAIVE"
+    EFFICIENT = "EFFICIENT"
+    PEELING = "PEELING"
+    ML = "ML"
+    HYBRID = "HYBRID"
+    FAST_SSC = "FAST_SSC"
+    COMPACT = "COMPACT"
+
+    SHORTENING = SHORTENING
+    PUNCTURING = PUNCTURING
 
-    def __init__(self, epsilon, blocklength=8, k_information_bits=4):
+    def __init__(self, epsilon, blocklength=8, k_information_bits=4, systematic=False, accelerated=False,
+                 reliability_sequence=None, rate_matching=None):
         """
         Initilazing polarcodes simulation
         :param epsilon: Erasure rate of BEC (E.g 0.2)
-        :param blocklength: Must be a power of 2
+        :param blocklength: amount of transmitted bits, if it is not a power of 2 the next
+                larger (mother) code is shortened or punctured to it
         :param n_information_bits: amount of Information bits in the Block
+        :param systematic: if true: the message appears verbatim in the codeword
+                (at positions systematic_indices), so that decoding can be skipped
+                if none of these positions got erased
+        :param accelerated: if true: encoding, SC decoding and the channel simulation use
+                the compiled backend (app.polarcodes.accelerated), falls back to NumPy
+                if Numba is not installed
+        :param reliability_sequence: ReliabilitySequence (up to at least blocklength) to take
+                the information set from, instead of constructing the code
+        :param rate_matching: SHORTENING or PUNCTURING for blocklengths that are not a power
+                of 2, chosen by the rate if None
         """
-        assert is_power_of_2(blocklength), 'blocklength should be the power of 2 (E.g 8)'
+        assert blocklength >= 1 and 0 <= k_information_bits <= blocklength, \
+            'k_information_bits should be between 0 and {}.'.format(blocklength)
 
         self._epsilon = epsilon
-        self._blocklength = blocklength
         self._k_information_bits = k_information_bits
 
-        # Computing the bhattacharyya parameters
-        self._z_parameters = compute_bhattacharyya_bec(epsilon, blocklength)
+        # Computing the bhattacharyya parameters and finding the K channels with
+        # the smallest value Z. The read-only description of the code (masks,
+        # positions of information and frozen bits) is shared by all coders
+        if reliability_sequence is None:
+            self._descriptor = code_descriptor(epsilon, blocklength, k_information_bits, rate_matching)
+        else:
+            assert is_power_of_2(blocklength), 'blocklength should be the power of 2 (E.g 8)'
+
+            self._descriptor = CodeDescriptor(epsilon, reliability_sequence.z_parameters(blocklength),
+                                              reliability_sequence.a(blocklength, k_information_bits))
+
+        # Length N of the (mother) code and amount of transmitted bits
+        self._blocklength = self._descriptor.blocklength
+        self._transmitted_blocklength = self._descriptor.transmitted_blocklength
+
+        self._z_parameters = self._descriptor.z_parameters
+        self._frozen_bits = self._descriptor.frozen_bits
 
-        # Find the K channels with the smallest value Z
-        # Note that A is logical vectors of length N
-        self._a = find_good_channels(self._z_parameters, self._k_information_bits, self._blocklength)
+        # Positions of information and frozen bits, so that encoding and decoding
+        # only need single fancy-index operations
+        self._information_indices = self._descriptor.information_indices
+        self._frozen_indices = self._descriptor.frozen_indices
 
-        # Chose frozen bits
-        self._frozen_bits = np.zeros(self._blocklength - self._k_information_bits)
+        # Frozen bits at their positions A_c, NaN at the information positions
+        self._frozen_bits_expanded = self._descriptor.frozen_bits_expanded
+
+        # Systematic codeword positions of the message: the bit-reversed information positions
+        self._systematic = systematic
+        self._systematic_indices = self._descriptor.systematic_indices
+
+        if systematic:
+            assert is_closed_under_domination(self._information_indices, self._blocklength), \
+                'information bits are not domination contiguous, systematic encoding is not possible'
+
+        # Tables of the ML decoder and tree of the Fast-SSC decoder, computed on first use
+        self._generator_columns = None
+        self._frozen_codeword = None
+        self._decoding_tree = None
+
+        self._accelerated = accelerated
+
+        # Scratch buffers of the compact SC decoder, one workspace per thread
+        self._workspaces = threading.local()
+
+    @classmethod
+    def shared(cls, epsilon, blocklength=8, k_information_bits=4, systematic=False, accelerated=False,
+               rate_matching=None):
+        """
+        Coder shared by all callers with the same configuration (E.g. all sessions
+        of a scheme). The coder holds no per-message state, decoding buffers are
+        kept per thread.
+        :return: Polarcodes instance
+        """
+        return _shared_polarcodes(cls, epsilon, blocklength, k_information_bits, systematic, accelerated,
+                                  rate_matching)
 
     def encode_input(self, message):
         """
@@ -49,29 +135,499 @@ class Polarcodes:
         assert len(message) == self._k_information_bits, \
             'message should have {} information bits.'.format(self._k_information_bits)
 
-        return encode_input(message, self._frozen_bits, self._a, self._blocklength)
+        if self._systematic:
+            encoded_input = encode_input_systematic(message, self._systematic_indices, self._blocklength)
+        elif self._accelerated:
+            encoded_input = accelerated_backend.encode_inputs(np.asarray(message)[np.newaxis],
+                                                              self._frozen_bits_expanded, self._information_indices)[0]
+        else:
+            encoded_input = encode_input(message, self._frozen_bits_expanded, self._information_indices)
+
+        return self._transmitted_bits(encoded_input)
+
+    def encode_inputs(self, messages):
+        """
+        Encodes several messages at once through a single vectorized polar transform
+        :param messages: M x k_information_bits array of bit messages
+        :return: M x blocklength array of encoded messages
+        """
+        assert np.shape(messages)[-1] == self._k_information_bits, \
+            'messages should have {} information bits.'.format(self._k_information_bits)
+
+        if self._systematic:
+            encoded_inputs = encode_inputs_systematic(messages, self._systematic_indices, self._blocklength)
+        elif self._accelerated:
+            encoded_inputs = accelerated_backend.encode_inputs(messages, self._frozen_bits_expanded,
+                                                               self._information_indices)
+        else:
+            encoded_inputs = encode_inputs(messages, self._frozen_bits_expanded, self._information_indices)
+
+        return self._transmitted_bits(encoded_inputs)
+
+    def encode_input_packed(self, message):
+        """
+        Encodes the message through polar transform into a bit-packed codeword
+        :param message: bit message of length k_information bits
+        :return: uint64 array, bit i of the codeword is bit i % 64 of word i // 64
+        """
+        assert len(message) == self._k_information_bits, \
+            'message should have {} information bits.'.format(self._k_information_bits)
+
+        return self.encode_inputs_packed(np.asarray(message)[np.newaxis])[0]
+
+    def encode_inputs_packed(self, messages):
+        """
+        Encodes several messages at once into bit-packed codewords
+        :param messages: M x k_information_bits array of bit messages
+        :return: M x ceil(blocklength / 64) uint64 array
+        """
+        assert np.shape(messages)[-1] == self._k_information_bits, \
+            'messages should have {} information bits.'.format(self._k_information_bits)
+
+        if self._systematic:
+            encoded_words = encode_inputs_packed_systematic(messages, self._systematic_indices, self._blocklength)
+        else:
+            encoded_words = encode_inputs_packed(messages, self._frozen_bits_expanded, self._information_indices)
+
+        if self._descriptor.rate_matched:
+            return pack_bits(self._transmitted_bits(unpack_bits(encoded_words, self._blocklength)))
+
+        return encoded_words
+
+    def unpack_encoded(self, packed_encoded):
+        """
+        Unpacks bit-packed codewords into bits
+        :param packed_encoded: uint64 array of one or several packed codewords
+        :return: uint8 array of bits
+        """
+        return unpack_bits(packed_encoded, self._transmitted_blocklength)
+
+    def decode_output(self, received_output, efficient=True, decoder=None):
+        """
+        Decodes the received output
+        :param received_output: numpy array of blocklength bits with erased bits (NaN),
+                or compact int8 bits with erased bits (ERASED). Unsigned bits (uint8 / bool)
+                are decoded as compact bits
+        :param efficient: O(N log N) decoder if true, O(N^2) decoder if false
+        :param decoder: NAIVE, EFFICIENT, PEELING, ML, HYBRID (SC with ML as fallback), FAST_SSC
+                or COMPACT (SC in O(N) memory), overrides efficient. If the code is accelerated,
+                EFFICIENT and COMPACT use the compiled SC decoder
+        :return: the decoded message (int8 for compact bits, float otherwise)
+        """
+        assert len(received_output) == self._transmitted_blocklength, \
+            'message should have {} block bits.'.format(self._transmitted_blocklength)
+        received_output = self._received_bits(received_output)
+
+        ternary = is_ternary(received_output)
+        received_output = self._mother_outputs(received_output)
+
+        if self._systematic:
+            systematic_output = np.asarray(received_output)[self._systematic_indices]
+
+            # Decoding can be skipped if no message bit got erased
+            if not erasure_mask(systematic_output).any():
+                return self._output_bits(systematic_output, ternary)
+
+        if decoder is None:
+            decoder = Polarcodes.EFFICIENT if efficient else Polarcodes.NAIVE
+
+        if self._accelerated and decoder in (Polarcodes.EFFICIENT, Polarcodes.COMPACT):
+            decoded_output = accelerated_backend.decode_output_sc(received_output, self._decoder_workspace())
+        elif decoder == Polarcodes.EFFICIENT:
+            decoded_output = decode_output_efficient(received_output, self._frozen_bits_expanded,
+                                                     self._information_indices)
+        elif decoder == Polarcodes.NAIVE:
+            decoded_output = decode_output_naive(received_output, self._frozen_bits_expanded,
+                                                 self._information_indices)
+        elif decoder == Polarcodes.PEELING:
+            decoded_output = decode_output_peeling(received_output, self._frozen_bits_expanded,
+                                                   self._information_indices)
+        elif decoder == Polarcodes.ML:
+            decoded_output = self._decode_output_ml(received_output)
+        elif decoder == Polarcodes.HYBRID:
+            # SC first, the erasure pattern tells us beforehand whether it would fail
+            if is_decodable(erasure_mask(received_output), self._information_indices):
+                decoded_output = decode_output_efficient(received_output, self._frozen_bits_expanded,
+                                                         self._information_indices)
+            else:
+                decoded_output = self._decode_output_ml(received_output)
+        elif decoder == Polarcodes.FAST_SSC:
+            if self._decoding_tree is None:
+                self._decoding_tree = build_decoding_tree(self._frozen_bits_expanded)
+
+            decoded_output = decode_output_fast_ssc(received_output, self._decoding_tree, self._frozen_bits_expanded,
+                                                    self._information_indices)
+        elif decoder == Polarcodes.COMPACT:
+            decoded_output = decode_output_compact(received_output, self._decoder_workspace())
+        else:
+            raise InvalidDecoder("{} is a invalid decoder".format(decoder))
+
+        if self._systematic:
+            decoded_output = self._reencode_systematic(decoded_output)
+
+        return self._output_bits(decoded_output, ternary)
+
+    def decode_output_stream(self, received_output, word_size=None):
+        """
+        Decodes the received output with SC and yields the message while decoding,
+        so that processing can start before the whole block is decoded. Raises
+        CouldNotDecodeError at the first erased information bit, after all
+        bits before it have been yielded.
+        :param received_output: numpy array of blocklength bits with erased bits (NaN),
+                or compact int8 bits with erased bits (ERASED)
+        :param word_size: if given: numpy arrays of word_size bits are yielded (the last
+                one may be shorter), otherwise single bits
+        :return: generator of the decoded message bits (int for compact bits, float otherwise)
+        """
+        assert len(received_output) == self._transmitted_blocklength, \
+            'message should have {} block bits.'.format(self._transmitted_blocklength)
+        received_output = self._received_bits(received_output)
+
+        ternary = is_ternary(received_output)
+        bit_type = int if ternary else float
+        mother_output = self._mother_outputs(received_output)
+
+        if self._systematic:
+            systematic_output = np.asarray(mother_output)[self._systematic_indices]
+
+            # The systematic message is only known after all information bits are decoded
+            if erasure_mask(systematic_output).any():
+                systematic_output = self.decode_output(received_output)
+
+            bits = (bit_type(bit) for bit in systematic_output)
+        else:
+            # An own workspace, the stream may be interleaved with other decodes
+            workspace = DecoderWorkspace(self._frozen_bits_expanded)
+            bits = (bit_type(bit) for bit in iterate_decoded_bits(mother_output, workspace))
+
+        if word_size is None:
+            yield from bits
+            return
+
+        word = []
+        for bit in bits:
+            word.append(bit)
+
+            if len(word) == word_size:
+                yield self._output_bits(word, ternary)
+                word = []
+
+        if word:
+            yield self._output_bits(word, ternary)
+
+    def decode_output_partial(self, received_output):
+        """
+        Decodes the received output with SC as far as possible, instead of raising
+        CouldNotDecodeError
+        :param received_output: numpy array of blocklength bits with erased bits (NaN),
+                or compact int8 bits with erased bits (ERASED)
+        :return: PartialDecodeResult with the message bits decoded before the first stuck
+                 information bit (int8 for compact bits, float otherwise), its position and
+                 the erased codeword positions to retransmit so that decoding succeeds
+        """
+        assert len(received_output) == self._transmitted_blocklength, \
+            'message should have {} block bits.'.format(self._transmitted_blocklength)
+        received_output = self._received_bits(received_output)
+
+        ternary = is_ternary(received_output)
+        received_output = self._mother_outputs(received_output)
+
+        if self._systematic:
+            systematic_output = np.asarray(received_output)[self._systematic_indices]
+            systematic_erasures = erasure_mask(systematic_output)
+
+            if not systematic_erasures.any():
+                return PartialDecodeResult(self._output_bits(systematic_output, ternary), None,
+                                           np.array([], dtype=int))
+
+        result = decode_output_partial(received_output, self._frozen_bits_expanded, self._information_indices,
+                                       self._descriptor.punctured_indices)
+
+        # Retransmission positions of the transmitted bits
+        retransmission_positions = np.searchsorted(self._descriptor.transmitted_indices,
+                                                   result.retransmission_positions)
+        decoded_output = result.decoded_output
+
+        if self._systematic:
+            if result.complete:
+                decoded_output = self._reencode_systematic(result.decoded_output)
+            else:
+                # The message bits in front of the first erased one are known without decoding
+                decoded_output = systematic_output[:np.argmax(systematic_erasures)]
+
+        return PartialDecodeResult(self._output_bits(decoded_output, ternary), result.stuck_index,
+                                   retransmission_positions)
+
+    def _decoder_workspace(self):
+        """
+        Workspace of the compact SC decoder of the current thread
+        """
+        workspace = getattr(self._workspaces, 'workspace', None)
+
+        if workspace is None:
+            workspace = DecoderWorkspace(self._frozen_bits_expanded)
+            self._workspaces.workspace = workspace
+
+        return workspace
+
+    def _decode_output_ml(self, received_output):
+        """
+        ML decoding, the generator tables are computed once
+        """
+        if self._generator_columns is None:
+            self._generator_columns, self._frozen_codeword = generator_columns(self._frozen_bits_expanded,
+                                                                               self._information_indices)
+
+        return decode_output_ml(received_output, self._generator_columns, self._frozen_codeword,
+                                self._k_information_bits)
+
+    def decode_outputs(self, received_outputs):
+        """
+        Decodes several received outputs at once with a batched SC decoder
+        :param received_outputs: M x blocklength array with erased bits (NaN), or compact
+                int8 array with erased bits (ERASED)
+        :return: M x k_information_bits array of decoded messages (int8 for compact bits,
+                 float otherwise), boolean array with the success of every row (instead
+                 of raising CouldNotDecodeError)
+        """
+        assert np.shape(received_outputs)[-1] == self._transmitted_blocklength, \
+            'messages should have {} block bits.'.format(self._transmitted_blocklength)
+        received_outputs = self._received_bits(received_outputs)
+
+        ternary = is_ternary(received_outputs)
+        received_outputs = self._mother_outputs(received_outputs)
+
+        decoded_outputs, success = decode_outputs_batch(received_outputs, self._frozen_bits_expanded,
+                                                        self._information_indices)
+        decoded_outputs = self._output_bits(decoded_outputs, ternary)
+
+        if self._systematic:
+            systematic_outputs = np.asarray(received_outputs)[:, self._systematic_indices]
+            not_erased = ~erasure_mask(systematic_outputs).any(axis=1)
+
+            decoded_outputs = self._output_bits(self._reencode_systematic(decoded_outputs), ternary)
+            decoded_outputs[not_erased] = systematic_outputs[not_erased]
+            success |= not_erased
+
+        return decoded_outputs, success
+
+    def analytic_block_error_rate(self, epsilon=None):
+        """
+        Block error rate of SC decoding from the bhattacharyya parameters of the
+        information bits, without any simulation
+        :param epsilon: Erasure rate of BEC, the one the code is constructed for if None
+                (the information set stays the same)
+        :return: BlockErrorBounds with lower bound, estimate and union bound
+        """
+        return analytic_block_error_rate(self._bhattacharyya_parameters(epsilon), self._information_indices)
+
+    def _bhattacharyya_parameters(self, epsilon):
+        """
+        Bhattacharyya parameters of the (mother) code on a BEC with erasure rate epsilon
+        """
+        if epsilon is None or epsilon == self._epsilon:
+            return self._z_parameters
+
+        # Shortened bits are known, punctured bits are erased
+        erasure_probabilities = np.full(self._blocklength, float(epsilon))
+        erasure_probabilities[self._descriptor.shortened_indices] = 0.
+        erasure_probabilities[self._descriptor.punctured_indices] = 1.
 
-    def decode_output(self, received_output, efficient=True):
+        return compute_bhattacharyya_bec_channels(erasure_probabilities)
 
-        assert len(received_output) == self._blocklength, \
-            'message should have {} block bits.'.format(self._blocklength)
+    def is_decodable(self, erasure_mask):
+        """
+        Checks cheaply whether SC decoding of a received output will succeed
+        :param erasure_mask: list of booleans for erased bits
+        :return: boolean
+        """
+        assert len(erasure_mask) == self._transmitted_blocklength, \
+            'erasure mask should have {} block bits.'.format(self._transmitted_blocklength)
+
+        return bool(self.is_decodable_batch(np.asarray(erasure_mask)[np.newaxis])[0])
+
+    def is_decodable_batch(self, erasure_masks):
+        """
+        Checks cheaply whether SC decoding of several received outputs will succeed
+        :param erasure_masks: M x blocklength boolean array of erased bits
+        :return: boolean array with M entries
+        """
+        assert np.shape(erasure_masks)[-1] == self._transmitted_blocklength, \
+            'erasure masks should have {} block bits.'.format(self._transmitted_blocklength)
 
-        if efficient:
-            return decode_output_efficient(received_output, self._frozen_bits, self._a)
+        erasure_masks = self._mother_erasure_masks(np.atleast_2d(np.asarray(erasure_masks, dtype=bool)))
+        decodable = is_decodable(erasure_masks, self._information_indices)
+
+        if self._systematic:
+            # Decoding is skipped if no message bit got erased
+            decodable |= ~erasure_masks[:, self._systematic_indices].any(axis=1)
+
+        return decodable
+
+    def _transmitted_bits(self, encoded):
+        """
+        Removes the shortened or punctured bits of (mother) codewords
+        :param encoded: codeword (N) or M x N codewords
+        :return: the transmitted bits
+        """
+        if not self._descriptor.rate_matched:
+            return encoded
+
+        return encoded[..., self._descriptor.transmitted_indices]
+
+    def _mother_outputs(self, received_outputs):
+        """
+        Inserts the shortened (known) and punctured (erased) bits into received outputs
+        :param received_outputs: received output or M x blocklength received outputs
+        :return: outputs of the (mother) code
+        """
+        if not self._descriptor.rate_matched:
+            return received_outputs
+
+        if is_ternary(received_outputs):
+            mother_outputs = np.full(received_outputs.shape[:-1] + (self._blocklength,), ERASED, dtype=np.int8)
         else:
-            return decode_output_naive(received_output, self._frozen_bits, self._a)
+            received_outputs = np.asarray(received_outputs, dtype=float)
+            mother_outputs = np.full(received_outputs.shape[:-1] + (self._blocklength,), np.nan)
+
+        mother_outputs[..., self._descriptor.transmitted_indices] = received_outputs
+        mother_outputs[..., self._descriptor.shortened_indices] = self._descriptor.shortened_values
 
-    def simulate_bec_channel(self, encoded_input, true_random=False):
+        return mother_outputs
+
+    def _mother_erasure_masks(self, erasure_masks):
+        """
+        Inserts the shortened (known) and punctured (erased) bits into erasure masks
+        :param erasure_masks: M x blocklength boolean array of erased bits
+        :return: M x N boolean array
+        """
+        if not self._descriptor.rate_matched:
+            return erasure_masks
+
+        mother_masks = np.zeros((len(erasure_masks), self._blocklength), dtype=bool)
+
+        mother_masks[:, self._descriptor.transmitted_indices] = erasure_masks
+        mother_masks[:, self._descriptor.punctured_indices] = True
+
+        return mother_masks
+
+    @staticmethod
+    def _received_bits(received_outputs):
+        """
+        Validates received outputs, unsigned bits (uint8 / bool) are converted into compact bits
+        :param received_outputs: received output or M x blocklength received outputs
+        :return: the received outputs (int8 if they were unsigned)
+        """
+        if is_unsigned(received_outputs):
+            return to_ternary(received_outputs)
+
+        check_received_bits(received_outputs)
+
+        return received_outputs
+
+    @staticmethod
+    def _output_bits(bits, ternary):
+        """
+        Decoded bits in the representation of the received output
+        :param bits: decoded bits
+        :param ternary: whether the received output was compact (int8)
+        :return: int8 numpy array if ternary, float numpy array otherwise
+        """
+        return np.asarray(bits, dtype=np.int8 if ternary else float)
+
+    def _reencode_systematic(self, decoded_output):
+        """
+        Recovers the systematic message from the decoded information bits
+        :param decoded_output: the decoded information bits u_A (K or M x K)
+        :return: the message bits of the codeword
+        """
+        bits_to_combine = np.repeat(self._frozen_bits_expanded[np.newaxis], len(np.atleast_2d(decoded_output)), axis=0)
+        bits_to_combine[:, self._information_indices] = decoded_output
+
+        encoded = polar_transform(bits_to_combine)[:, self._systematic_indices]
+
+        return encoded.reshape(np.shape(decoded_output))
+
+    def simulate_bec_channel(self, encoded_input, true_random=False, rng=None):
         """
         Replaces random bits with NaN values
 
         :param encoded_input_copy: Numpy array with either 0 or 1
         :param true_random: if true: every bit gets possibility of epsilon to get erased.
                 if false: guaranteed amount of epsilon % bits erased
+        :param rng: numpy Generator or seed, a shared generator if None
 
         :return: Numpy array with erased bits
         """
-        return bec_simulation.simulate_bec_channel(encoded_input, self._epsilon, true_random)
+        if self._accelerated:
+            return accelerated_backend.simulate_bec_channel(encoded_input, self._epsilon, true_random, rng)
+
+        return bec_simulation.simulate_bec_channel(encoded_input, self._epsilon, true_random, rng)
+
+    def simulate_bec_channels(self, encoded_inputs, true_random=False, rng=None, out=None):
+        """
+        Replaces random bits of several encoded inputs with NaN values at once
+
+        :param encoded_inputs: M x blocklength array with either 0 or 1
+        :param true_random: if true: every bit gets possibility of epsilon to get erased.
+                if false: guaranteed amount of epsilon % bits erased in every block
+        :param rng: numpy Generator or seed, a shared generator if None
+        :param out: optional M x blocklength float array to write the result to
+        :return: M x blocklength array with erased bits
+        """
+        if self._accelerated:
+            return accelerated_backend.simulate_bec_channels(encoded_inputs, self._epsilon, true_random, rng, out)
+
+        return bec_simulation.simulate_bec_channels(encoded_inputs, self._epsilon, true_random, rng, out)
+
+    def erasure_masks(self, n_blocks, true_random=False, rng=None):
+        """
+        Draws the erasure patterns of several blocks at once
+
+        :param n_blocks: amount of blocks
+        :param true_random: if true: every bit gets possibility of epsilon to get erased.
+                if false: guaranteed amount of epsilon % bits erased in every block
+        :param rng: numpy Generator or seed, a shared generator if None
+        :return: n_blocks x blocklength boolean array, true for erased bits
+        """
+        return bec_simulation.erasure_masks(n_blocks, self._transmitted_blocklength, self._epsilon, true_random, rng)
+
+    def simulate_channel(self, encoded_inputs, channel, interleaving_depth=1, rng=None, out=None):
+        """
+        Transmits encoded inputs back to back over a channel model (E.g. a bursty
+        GilbertElliottChannel), optionally through a block interleaver that spreads
+        every codeword over interleaving_depth consecutive ones
+
+        :param encoded_inputs: M x blocklength array with either 0 or 1 (M a multiple of interleaving_depth)
+        :param channel: ChannelModel of app.polarcodes.channels
+        :param interleaving_depth: amount of codewords that are interleaved together, 1 for no interleaving
+        :param rng: numpy Generator or seed, a shared generator if None
+        :param out: optional M x blocklength array to write the result to
+        :return: M x blocklength array with erased bits, in the order of the codewords
+        """
+        masks = self.channel_erasure_masks(len(encoded_inputs), channel, interleaving_depth, rng)
+
+        if self._accelerated:
+            return accelerated_backend.erase(encoded_inputs, masks, out)
+
+        return bec_simulation.erase(encoded_inputs, masks, out)
+
+    def channel_erasure_masks(self, n_blocks, channel, interleaving_depth=1, rng=None):
+        """
+        Draws the erasure patterns of several blocks sent over a channel model
+
+        :param n_blocks: amount of blocks (a multiple of interleaving_depth)
+        :param channel: ChannelModel of app.polarcodes.channels
+        :param interleaving_depth: amount of codewords that are interleaved together, 1 for no interleaving
+        :param rng: numpy Generator or seed, a shared generator if None
+        :return: n_blocks x blocklength boolean array, true for erased bits (in the order of the codewords)
+        """
+        masks = channel.erasure_masks(n_blocks, self._transmitted_blocklength, rng)
+
+        if interleaving_depth == 1:
+            return masks
+
+        return deinterleave_blocks(masks, interleaving_depth)
 
     def erase_bits(self, encoded_input, bits_to_erase):
         """
@@ -83,18 +639,59 @@ class Polarcodes:
         return bec_simulation.erase_bits(encoded_input, bits_to_erase)
 
 
+    @property
+    def descriptor(self):
+        return self._descriptor
+
+    @property
+    def epsilon(self):
+        return self._epsilon
+
+    @property
+    def k_information_bits(self):
+        return self._k_information_bits
+
     @property
     def z_parameters(self):
         return self._z_parameters
 
     @property
     def a(self):
-        return self._a
+        return self._descriptor.information_mask.astype(float)
 
     @property
     def blocklength(self):
+        return self._transmitted_blocklength
+
+    @property
+    def mother_blocklength(self):
         return self._blocklength
 
+    @property
+    def rate_matching(self):
+        return self._descriptor.rate_matching
+
+    @property
+    def accelerated(self):
+        return self._accelerated
+
+    @property
+    def systematic(self):
+        return self._systematic
+
+    @property
+    def systematic_indices(self):
+        # Positions of the message bits in the transmitted codeword
+        return np.searchsorted(self._descriptor.transmitted_indices, self._systematic_indices)
+
+    @property
+    def information_indices(self):
+        return self._information_indices
+
+    @property
+    def frozen_indices(self):
+        return self._frozen_indices
+
     @staticmethod
     def erase_bits(encoded_input, bits_to_erase):
         """
@@ -107,6 +704,12 @@ class Polarcodes:
         return bec_simulation.erase_bits(encoded_input, bits_to_erase)
 
 
+@lru_cache(maxsize=256)
+def _shared_polarcodes(cls, epsilon, blocklength, k_information_bits, systematic, accelerated, rate_matching):
+    return cls(epsilon, blocklength, k_information_bits, systematic=systematic, accelerated=accelerated,
+               rate_matching=rate_matching)
+
+
 if __name__ == '__main__':
     example = Polarcodes(0.1)
     print(example.encode_input([0,0,0,0]))
@@ -0,0 +1,97 @@
+"""
+ Rate matching of polar codes to any blocklength M by shortening or
+ puncturing a mother code of length N (the next power of 2).
+
+ Work on z = u F^(x n), the codeword before the bit-reversal, with P = N - M:
+ - Shortening: u_(N-P) ... u_(N-1) are frozen. z_j only depends on the u_i
+   whose binary digits include those of j, so z_(N-P) ... z_(N-1) are known
+   to the decoder and are not transmitted.
+ - Puncturing: z_0 ... z_(P-1) are not transmitted (erased for the decoder)
+   and u_0 ... u_(P-1), which cannot be recovered anymore, are frozen.
+
+ The code is constructed for the resulting channels (erasure rate 0 for
+ shortened, 1 for punctured and epsilon for transmitted bits).
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from app.polarcodes.bhattacharyya import compute_bhattacharyya_bec_channels
+from app.polarcodes.channel_finder import find_good_channels
+from app.polarcodes.exceptions.exceptions import InvalidRateMatching
+from app.polarcodes.helper import bit_reversal_permutation
+
+SHORTENING = "SHORTENING"
+PUNCTURING = "PUNCTURING"
+
+
+def mother_blocklength(blocklength):
+    """
+    :param blocklength: amount of transmitted bits
+    :return: the smallest power of 2 not below blocklength
+    """
+    return 1 << max(int(blocklength) - 1, 0).bit_length()
+
+
+def default_rate_matching(blocklength, k_information_bits):
+    """
+    Shortening performs better for high rates, puncturing for low rates
+    :param blocklength: amount of transmitted bits
+    :param k_information_bits: amount of Information bits in the Block
+    :return: SHORTENING or PUNCTURING
+    """
+    return SHORTENING if k_information_bits > 7 / 16 * blocklength else PUNCTURING
+
+
+def removed_positions(blocklength, rate_matching):
+    """
+    Bits of the mother code that are not transmitted
+    :param blocklength: amount of transmitted bits
+    :param rate_matching: SHORTENING or PUNCTURING
+    :return: sorted codeword positions that are not transmitted, sorted positions of the frozen bits they force
+    """
+    n = mother_blocklength(blocklength)
+    n_removed = n - blocklength
+
+    if rate_matching == SHORTENING:
+        forced_frozen_indices = np.arange(n - n_removed, n)
+    elif rate_matching == PUNCTURING:
+        forced_frozen_indices = np.arange(n_removed)
+    else:
+        raise InvalidRateMatching("{} is a invalid rate matching".format(rate_matching))
+
+    # The removed bits of z are the same positions of u, bit-reversed in the codeword
+    return np.sort(bit_reversal_permutation(n)[forced_frozen_indices]), forced_frozen_indices
+
+
+@lru_cache(maxsize=256)
+def construct_rate_matched_code(epsilon, blocklength, k_information_bits, rate_matching):
+    """
+    Bhattacharyya parameters and the K best channels of a shortened or punctured code
+    :param epsilon: Erasure rate of BEC
+    :param blocklength: amount of transmitted bits
+    :param k_information_bits: amount of Information bits in the Block
+    :param rate_matching: SHORTENING or PUNCTURING
+    :return: read-only numpy arrays z (1 for the frozen bits forced by the rate matching)
+             and A (1 for information bits) of the mother code
+    """
+    assert 0 <= k_information_bits <= blocklength, 'k should be between 0 and {}.'.format(blocklength)
+
+    n = mother_blocklength(blocklength)
+    removed, forced_frozen_indices = removed_positions(blocklength, rate_matching)
+
+    erasure_probabilities = np.full(n, float(epsilon))
+    erasure_probabilities[removed] = 0. if rate_matching == SHORTENING else 1.
+
+    z_parameters = compute_bhattacharyya_bec_channels(erasure_probabilities)
+    z_parameters[forced_frozen_indices] = 1.
+
+    # The forced frozen bits must never be chosen, not even on ties
+    z_selection = z_parameters.copy()
+    z_selection[forced_frozen_indices] = np.inf
+    a = find_good_channels(z_selection, k_information_bits, n)
+
+    z_parameters.flags.writeable = False
+    a.flags.writeable = False
+
+    return z_parameters, a
@@ -0,0 +1,111 @@
+"""
+ Reliability sequence of the synthetic BEC channels for every blocklength up
+ to a maximum.
+
+ The bhattacharyya parameters are tracked in the log domain as (log z,
+ log(1 - z)), so channels stay distinguishable where z saturates to 0 or 1 in
+ float64 (N = 2^20 and above). The channels of every level are ordered once,
+ afterwards the information set of any (N, K) is derived in O(N).
+"""
+import numpy as np
+
+from app.polarcodes.helper import is_power_of_2
+
+
+class ReliabilitySequence:
+
+    def __init__(self, epsilon, max_blocklength):
+        """
+        Orders the channels of all blocklengths 1, 2, 4, ..., max_blocklength
+        :param epsilon: Erasure rate of BEC (E.g 0.2)
+        :param max_blocklength: Must be a power of 2
+        """
+        assert is_power_of_2(max_blocklength), 'blocklength should be the power of 2 (E.g 8)'
+
+        self._epsilon = epsilon
+        self._max_blocklength = max_blocklength
+
+        with np.errstate(divide='ignore'):
+            log_z = np.array([np.log(epsilon)], dtype=float)
+            log_one_minus_z = np.array([np.log1p(-epsilon)], dtype=float)
+
+        # Per level: log z and the channels sorted from the most to the least reliable
+        self._log_z_parameters = [log_z]
+        self._orders = [np.zeros(1, dtype=np.intp)]
+
+        while len(log_z) < max_blocklength:
+            next_log_z = np.empty(2 * len(log_z))
+            next_log_one_minus_z = np.empty(2 * len(log_z))
+
+            # Odd indices: z' = 2z - z^2 = z (1 + (1 - z)), 1 - z' = (1 - z)^2
+            next_log_z[0::2] = log_z + np.log1p(np.exp(log_one_minus_z))
+            next_log_one_minus_z[0::2] = 2 * log_one_minus_z
+
+            # Even indices: z' = z^2, 1 - z' = (1 - z)(1 + z)
+            next_log_z[1::2] = 2 * log_z
+            next_log_one_minus_z[1::2] = log_one_minus_z + np.log1p(np.exp(log_z))
+
+            log_z, log_one_minus_z = next_log_z, next_log_one_minus_z
+
+            # The logit log(z / (1 - z)) is monotone in z and does not saturate
+            self._log_z_parameters.append(log_z)
+            self._orders.append(np.argsort(log_z - log_one_minus_z, kind='stable'))
+
+        for array in self._log_z_parameters + self._orders:
+            array.flags.writeable = False
+
+    def order(self, blocklength):
+        """
+        :param blocklength: power of 2 up to max_blocklength
+        :return: channels sorted from the most to the least reliable
+        """
+        return self._orders[self._level(blocklength)]
+
+    def log_z_parameters(self, blocklength):
+        """
+        :param blocklength: power of 2 up to max_blocklength
+        :return: logarithm of the bhattacharyya parameters
+        """
+        return self._log_z_parameters[self._level(blocklength)]
+
+    def z_parameters(self, blocklength):
+        """
+        :param blocklength: power of 2 up to max_blocklength
+        :return: bhattacharyya parameters
+        """
+        return np.exp(self.log_z_parameters(blocklength))
+
+    def information_set(self, blocklength, k_information_bits):
+        """
+        :param blocklength: power of 2 up to max_blocklength
+        :param k_information_bits: amount of Information bits in the Block
+        :return: sorted positions of the K most reliable channels
+        """
+        return np.flatnonzero(self.a(blocklength, k_information_bits))
+
+    def a(self, blocklength, k_information_bits):
+        """
+        :param blocklength: power of 2 up to max_blocklength
+        :param k_information_bits: amount of Information bits in the Block
+        :return: 1 x BLOCKLENGTH vector, 1 for the K most reliable channels
+        """
+        assert 0 <= k_information_bits <= blocklength, 'k should be between 0 and {}.'.format(blocklength)
+
+        a = np.zeros(blocklength)
+        a[self.order(blocklength)[:k_information_bits]] = 1
+
+        return a
+
+    def _level(self, blocklength):
+        assert is_power_of_2(blocklength) and blocklength <= self._max_blocklength, \
+            'blocklength should be a power of 2 up to {}.'.format(self._max_blocklength)
+
+        return int(blocklength).bit_length() - 1
+
+    @property
+    def epsilon(self):
+        return self._epsilon
+
+    @property
+    def max_blocklength(self):
+        return self._max_blocklength
@@ -11,13 +11,24 @@ import random
 import numpy as np
 
 from app.cipher.block_cipher import BlockCipher
+from app.cipher.exceptions.exceptions import InvalidPadding
 from app.cipher.helper import bits_to_hex
+from app.polarcodes.exceptions.exceptions import CouldNotDecodeError
+from app.polarcodes.helper import ERASED, to_ternary
+from app.polarcodes.interleaver import deinterleave, interleave
 from app.polarcodes.polarcodes import Polarcodes
 
+# Block size of the ciphers (in ECB mode), messages are decrypted block by block
+CIPHER_BLOCK_SIZE = 64
+
+# Amount of message counters, from the current one on, whose bec positions a scheme keeps
+BEC_POSITIONS_WINDOW = 256
+
 
 class Scheme:
 
-    def __init__(self, cipher=BlockCipher.DES, key_size=64, blocklength=64, erasure_rate=0.25, bec_block=128):
+    def __init__(self, cipher=BlockCipher.DES, key_size=64, blocklength=64, erasure_rate=0.25, bec_block=128,
+                 interleaving_depth=1):
         """
         Scheme with leightweight block encryption + simulated bec channel
         :param cipher: Simon, Speck, DES
@@ -25,14 +36,18 @@ class Scheme:
         :param blocklength: bit size of message
         :param erasure_rate: bec erasure rate
         :param bec_block: bit size of polarcode block
+        :param interleaving_depth: rows of the block interleaver the encoded message is sent
+                through, so that bursts on the link hit bits far apart in the codeword (1 for none)
         """
         self._block_cipher = BlockCipher(cipher, key_size, blocklength)
         self._information_rate = blocklength / bec_block
-        self._erasure_rate = erasure_rate
-        self._polarcodes = Polarcodes(erasure_rate, bec_block, blocklength)
+        self._interleaving_depth = interleaving_depth
+        self._polarcodes = Polarcodes.shared(erasure_rate, bec_block, blocklength)
         self._n_transmitted_messages = 0
         self._bec_block = bec_block
+        self._blocklength = blocklength
         self._erasure_rate = erasure_rate
+        self._bec_positions_cache = {}
 
     def set_key(self, key):
         """
@@ -41,65 +56,318 @@ class Scheme:
         """
         self._block_cipher.set_secret_key(key)
         self._key = key
+        self._key_seed = bits_to_hex(key)
+        self._bec_positions_cache = {}
 
     def encode(self, message):
         """
         Encoding the message
         :param message: bit message
-        :return: encoded message
+        :return: encoded message (int8 numpy array of the kept bits)
         """
-        encrypted_message = self._block_cipher.encrypt_message(message)
-        erasure_positions = self.get_bec_positions(self._key)
+        encrypted_message = np.array(self._block_cipher.encrypt_message(message), dtype=np.int8)
+        _, kept_indices, _ = self._bec_positions()
         encoded_message = self._polarcodes.encode_input(encrypted_message)
-        erased_message = self._polarcodes.erase_bits(encoded_message, erasure_positions)
-        bec_message = erased_message[~np.isnan(erased_message)]
+        bec_message = encoded_message[kept_indices]
+
+        if self._interleaving_depth > 1:
+            bec_message = interleave(bec_message, self._interleaving_depth)
+
         return bec_message
 
+    def encode_many(self, messages, start=None):
+        """
+        Encoding several messages at once, message i is sent with the message counter start + i
+        :param messages: M x blocklength bit array
+        :param start: message counter of the first message, the current one if None
+                (the counter is not advanced, see successfully_transmitted)
+        :return: M x (kept bits) int8 numpy array of encoded messages
+        """
+        kept_indices, _ = self._bec_positions_many(self._message_counters(len(messages), start))
+
+        encrypted_messages = self._block_cipher.encrypt_messages(messages)
+        encoded_messages = self._polarcodes.encode_inputs(encrypted_messages)
+        bec_messages = np.take_along_axis(encoded_messages, kept_indices, axis=1)
+
+        if self._interleaving_depth > 1:
+            bec_messages = interleave(bec_messages, self._interleaving_depth)
+
+        return bec_messages
+
+    def decode_many(self, encoded_messages, start=None):
+        """
+        Decoding several messages at once, message i was sent with the message counter start + i
+        :param encoded_messages: M x (kept bits) array of encoded messages
+        :param start: message counter of the first message, the current one if None
+        :return: M x blocklength int8 numpy array of decoded messages, boolean array with the
+                 success of every message (instead of raising CouldNotDecodeError, the bits of
+                 unsuccessful messages are meaningless)
+        """
+        return self._decode_messages(encoded_messages, self._message_counters(len(encoded_messages), start))
+
+    def encode_byte_stream(self, chunks, batch_size=256, start=None):
+        """
+        Encoding a byte stream of any length, lazily and with bounded memory. The bytes are
+        split into messages of blocklength bits, the last one padded (0x80 followed by zero
+        bytes), and encoded batch by batch. The message counter is advanced past every frame.
+        :param chunks: iterable of bytes-like chunks of any size
+        :param batch_size: amount of messages encoded at once
+        :param start: message counter of the first frame, the current one if None
+        :return: generator of frames (message counter, int8 numpy array of the kept bits)
+        """
+        counter = self._n_transmitted_messages if start is None else start
+
+        for batch in _message_batches(chunks, self._blocklength // 8, batch_size):
+            messages = np.unpackbits(np.frombuffer(batch, dtype=np.uint8)).reshape(-1, self._blocklength)
+            encoded_messages = self.encode_many(messages, counter)
+
+            for encoded_message in encoded_messages:
+                self._set_message_counter(counter + 1)
+                yield counter, encoded_message
+                counter += 1
+
+    def decode_byte_stream(self, frames, batch_size=256):
+        """
+        Decoding the frames of encode_byte_stream batch by batch, with bounded memory. The
+        message counter is advanced past every decoded frame.
+        :param frames: iterable of frames (message counter, encoded message)
+        :param batch_size: amount of messages decoded at once
+        :return: generator of the decoded bytes, their concatenation is the encoded byte stream.
+                 Raises CouldNotDecodeError at the first message that cannot be decoded (after
+                 yielding all bytes in front of it) and InvalidPadding if the stream is truncated
+        """
+        # The last message is only known at the end of the stream, it holds the padding
+        pending = b''
+
+        for batch in _batches(frames, batch_size):
+            counters = [counter for counter, _ in batch]
+            decoded_messages, success = self._decode_messages(np.array([encoded for _, encoded in batch]), counters)
+            decoded_bytes = np.packbits(decoded_messages.astype(np.uint8)).tobytes()
+
+            if not success.all():
+                # Everything in front of the message is delivered before failing, the
+                # counter stays at the message, like without successfully_transmitted
+                n_decoded = int(np.argmin(success))
+                if n_decoded:
+                    self._set_message_counter(counters[n_decoded - 1] + 1)
+
+                yield pending + decoded_bytes[:n_decoded * self._blocklength // 8]
+
+                raise CouldNotDecodeError("message {} could not be decoded".format(counters[n_decoded]))
+
+            self._set_message_counter(counters[-1] + 1)
+
+            if pending:
+                yield pending
+            pending = decoded_bytes
+
+        unpadded = pending.rstrip(b'\x00')
+
+        if not unpadded.endswith(b'\x80'):
+            raise InvalidPadding("stream is not padded, it may be truncated")
+
+        if len(unpadded) > 1:
+            yield unpadded[:-1]
+
+    def _decode_messages(self, encoded_messages, counters):
+        """
+        Decoding several messages sent with the given message counters, see decode_many
+        """
+        kept_indices, _ = self._bec_positions_many(counters)
+
+        if self._interleaving_depth > 1:
+            encoded_messages = deinterleave(encoded_messages, self._interleaving_depth)
+
+        erased_messages = np.full((len(encoded_messages), self._bec_block), ERASED, dtype=np.int8)
+        np.put_along_axis(erased_messages, kept_indices, to_ternary(encoded_messages), axis=1)
+
+        encrypted_messages, success = self._polarcodes.decode_outputs(erased_messages)
+
+        decrypted_messages = np.zeros_like(encrypted_messages)
+        decrypted_messages[success] = self._block_cipher.decrypt_messages(encrypted_messages[success])
+
+        return decrypted_messages, success
+
     def get_bec_positions(self, key):
         """
         Getting the positions of the simulated bec channel
         :param key: bit key for the seed
-        :return: list of booleans of bits to be erased
+        :return: read-only numpy array of booleans of bits to be erased
+        """
+        erasure_mask, _, _ = _bec_positions(bits_to_hex(key) + self._n_transmitted_messages, self._bec_block,
+                                            round(self._bec_block * self._erasure_rate))
+        return erasure_mask
+
+    def _bec_positions(self, counter=None):
         """
-        # n erased bits
-        positions = [True] * round(self._bec_block * self._erasure_rate)
-        n_erased = len(positions)
+        Positions of the simulated bec channel for the current key and a message counter,
+        computed once per counter for encoding and decoding. The positions are derived from
+        the key, so they are only kept by the scheme: for the counters of the window from the
+        current one on, until the message is transmitted or the key changes (see set_key)
+        :param counter: message counter, the current one if None
+        :return: erasure mask, positions of the kept bits, positions of the erased bits
+        """
+        if counter is None:
+            counter = self._n_transmitted_messages
+
+        positions = self._bec_positions_cache.get(counter)
 
-        # n kept bits
-        positions = positions + [False] * (self._bec_block - n_erased)
-        seed = bits_to_hex(key) + self._n_transmitted_messages
-        random.Random(seed).shuffle(positions)
+        if positions is None:
+            positions = _bec_positions(self._key_seed + counter, self._bec_block,
+                                       round(self._bec_block * self._erasure_rate))
+
+            if 0 <= counter - self._n_transmitted_messages < BEC_POSITIONS_WINDOW:
+                self._bec_positions_cache[counter] = positions
 
         return positions
 
+    def _bec_positions_many(self, counters):
+        """
+        Positions of the simulated bec channel for several message counters
+        :return: M x (kept bits) positions of the kept bits, M x (erased bits) positions of the erased bits
+        """
+        n_messages = len(counters)
+        n_erased = round(self._bec_block * self._erasure_rate)
+        positions = [self._bec_positions(counter) for counter in counters]
+
+        kept_indices = np.array([kept for _, kept, _ in positions], dtype=np.intp).reshape(
+            n_messages, self._bec_block - n_erased)
+        erased_indices = np.array([erased for _, _, erased in positions], dtype=np.intp).reshape(n_messages, n_erased)
+
+        return kept_indices, erased_indices
+
     def decode(self, encoded_message):
         """
         decoding the message based on the scheme
         :param encoded_message: encoded message
         :return: decoded message
         """
-        erased_bit_positions = self.get_bec_positions(self._key)
-        erased_message = np.zeros(len(erased_bit_positions))
-        erased_index = 0
+        erased_message = self._erased_message(encoded_message)
 
-        for i in range(len(erased_bit_positions)):
-            if erased_bit_positions[i]:
-                erased_message[i] = np.nan
-            else:
-                erased_message[i] = encoded_message[erased_index]
-                erased_index += 1
-
-        encrypted_message = self._polarcodes.decode_output(erased_message)
-        encrypted_message = [int(i) for i in encrypted_message]
+        encrypted_message = self._polarcodes.decode_output(erased_message).tolist()
         decrypted_message = self._block_cipher.decrypt_message(encrypted_message)
 
         return decrypted_message
 
-    def successfully_transmitted(self):
+    def decode_stream(self, encoded_message):
+        """
+        decoding the message based on the scheme, every cipher block is decrypted
+        as soon as its bits are decoded
+        :param encoded_message: encoded message
+        :return: generator of the decrypted cipher blocks (64 bits each), their
+                 concatenation is the decoded message
+        """
+        erased_message = self._erased_message(encoded_message)
+
+        for encrypted_block in self._polarcodes.decode_output_stream(erased_message, word_size=CIPHER_BLOCK_SIZE):
+            yield self._block_cipher.decrypt_message(encrypted_block.tolist())
+
+    def _erased_message(self, encoded_message):
+        """
+        Reinserting the erased bits (ERASED) of the simulated bec channel
+        :param encoded_message: encoded message, bits erased on the link are NaN (or ERASED)
+        :return: int8 numpy array of the polarcode block
+        """
+        if self._interleaving_depth > 1:
+            encoded_message = deinterleave(encoded_message, self._interleaving_depth)
+
+        _, kept_indices, _ = self._bec_positions()
+        erased_message = np.full(self._bec_block, ERASED, dtype=np.int8)
+        erased_message[kept_indices] = to_ternary(encoded_message)
+
+        return erased_message
+
+    def _message_counters(self, n_messages, start=None):
+        """
+        Consecutive message counters, starting at the current one if start is None
+        """
+        if start is None:
+            start = self._n_transmitted_messages
+
+        return range(start, start + n_messages)
+
+    def successfully_transmitted(self, count=1):
         """
         Incrementing seed for erased bits
+        :param count: amount of transmitted messages (E.g. of encode_many)
         """
-        self._n_transmitted_messages+= 1
+        self._set_message_counter(self._n_transmitted_messages + count)
+
+    def _set_message_counter(self, counter):
+        """
+        Advancing the message counter, the bec positions of the transmitted messages are dropped
+        :param counter: message counter of the next message
+        """
+        self._n_transmitted_messages = counter
+
+        for transmitted_counter in [cached for cached in self._bec_positions_cache if cached < counter]:
+            del self._bec_positions_cache[transmitted_counter]
+
+
+def _message_batches(chunks, message_bytes, batch_size):
+    """
+    Regroups byte chunks of any size into batches of batch_size messages, the
+    last batch is padded to whole messages (0x80 followed by zero bytes)
+    :return: generator of bytes, a multiple of message_bytes long
+    """
+    batch_bytes = message_bytes * batch_size
+    buffer = bytearray()
+
+    for chunk in chunks:
+        view = memoryview(chunk).cast('B')
+
+        while len(view):
+            n_bytes = batch_bytes - len(buffer)
+            buffer += view[:n_bytes]
+            view = view[n_bytes:]
+
+            if len(buffer) == batch_bytes:
+                yield bytes(buffer)
+                buffer.clear()
+
+    buffer += b'\x80'
+    buffer += bytes(-len(buffer) % message_bytes)
+
+    yield bytes(buffer)
+
+
+def _batches(items, batch_size):
+    """
+    Groups an iterable into lists of batch_size items (the last one may be shorter)
+    """
+    batch = []
+
+    for item in items:
+        batch.append(item)
+
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def _bec_positions(seed, bec_block, n_erased):
+    """
+    Erased positions of a polarcode block for a seed (key and message counter)
+
+    The first n_erased of bec_block positions get erased and shuffled with
+    random.Random(seed). The shuffle only depends on the seed and the length,
+    so shuffling the positions instead of the booleans gives the same pattern.
+    :return: read-only erasure mask, positions of the kept bits, positions of the erased bits
+    """
+    positions = list(range(bec_block))
+    random.Random(seed).shuffle(positions)
+
+    erasure_mask = np.array(positions) < n_erased
+    kept_indices = np.flatnonzero(~erasure_mask)
+    erased_indices = np.flatnonzero(erasure_mask)
+
+    for array in (erasure_mask, kept_indices, erased_indices):
+        array.flags.writeable = False
+
+    return erasure_mask, kept_indices, erased_indices
 
 
 if __name__ == '__main__':
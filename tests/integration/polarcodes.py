@@ -1,6 +1,19 @@
+import os
+import tempfile
 import unittest
+from fractions import Fraction
 
+import numpy as np
+
+from app.polarcodes import construction
+from app.polarcodes.channels import GilbertElliottChannel
+from app.polarcodes.exceptions.exceptions import CouldNotDecodeError, InvalidCharacterInMessage
+from app.polarcodes.helper import to_ternary
+from app.polarcodes.importance_sampling import estimate_block_error_rate_biased, \
+    estimate_block_error_rate_stratified
+from app.polarcodes.interleaver import deinterleave_blocks, interleave_blocks
 from app.polarcodes.polarcodes import Polarcodes
+from app.polarcodes.reliability import ReliabilitySequence
 
 
 class TestPolarCodes(unittest.TestCase):
@@ -57,6 +70,452 @@ class TestPolarCodes(unittest.TestCase):
                 self.assertCountEqual(message, decoded_output_1)
                 self.assertCountEqual(message, decoded_output_2)
 
+    def test_batch_encoding(self):
+        coder = Polarcodes(0.5, 64, 16)
+        messages = np.random.randint(0, 2, size=(20, 16))
+
+        encoded_inputs = coder.encode_inputs(messages)
+
+        self.assertEqual((20, 64), encoded_inputs.shape)
+
+        for message, encoded_input in zip(messages, encoded_inputs):
+            self.assertListEqual(list(coder.encode_input(message)), list(encoded_input))
+
+    def test_packed_encoding(self):
+        for blocklength, k in [(8, 4), (64, 16), (1024, 512)]:
+            coder = Polarcodes(0.5, blocklength, k)
+            messages = np.random.randint(0, 2, size=(10, k))
+
+            packed_inputs = coder.encode_inputs_packed(messages)
+
+            self.assertEqual(np.uint64, packed_inputs.dtype)
+            self.assertListEqual(list(coder.encode_inputs(messages).ravel()),
+                                 list(coder.unpack_encoded(packed_inputs).ravel()))
+            self.assertListEqual(list(coder.encode_input(messages[0])),
+                                 list(coder.unpack_encoded(coder.encode_input_packed(messages[0]))))
+
+    def test_systematic_encoding(self):
+        coder = Polarcodes(0.3, 64, 32, systematic=True)
+        messages = np.random.randint(0, 2, size=(10, 32))
+
+        encoded_inputs = coder.encode_inputs(messages)
+        self.assertListEqual(messages.tolist(), encoded_inputs[:, coder.systematic_indices].tolist())
+        self.assertListEqual(list(encoded_inputs.ravel()),
+                             list(coder.unpack_encoded(coder.encode_inputs_packed(messages)).ravel()))
+
+        for message, encoded_input in zip(messages, encoded_inputs):
+            erasure = [False] * coder.blocklength
+            self.assertListEqual(list(message), list(coder.decode_output(coder.erase_bits(encoded_input, erasure))))
+
+            # Erasing a message bit needs the decoder
+            erasure[coder.systematic_indices[0]] = True
+            received_output = coder.erase_bits(encoded_input, erasure)
+            self.assertListEqual(list(message), list(coder.decode_output(received_output, efficient=True)))
+            self.assertListEqual(list(message), list(coder.decode_output(received_output, efficient=False)))
+
+    def test_peeling_decoder(self):
+        coder = Polarcodes(0.4, 256, 128)
+
+        for _ in range(20):
+            message = np.random.randint(0, 2, size=128)
+            received_output = coder.simulate_bec_channel(coder.encode_input(message), true_random=True)
+
+            try:
+                decoded_output = coder.decode_output(received_output)
+            except CouldNotDecodeError:
+                continue
+
+            # Peeling recovers at least every pattern SC recovers
+            self.assertListEqual(list(decoded_output), list(coder.decode_output(received_output, decoder=Polarcodes.PEELING)))
+
+        received_output = np.zeros(256)
+        received_output[3] = 2
+        with self.assertRaises(InvalidCharacterInMessage):
+            coder.decode_output(received_output, decoder=Polarcodes.PEELING)
+
+    def test_batch_decoding(self):
+        for systematic in [False, True]:
+            coder = Polarcodes(0.5, 128, 32, systematic=systematic)
+            messages = np.random.randint(0, 2, size=(30, 32))
+            received_outputs = np.array([coder.simulate_bec_channel(encoded_input, true_random=True)
+                                         for encoded_input in coder.encode_inputs(messages)])
+
+            decoded_outputs, success = coder.decode_outputs(received_outputs)
+
+            for message, received_output, decoded_output, decoded in zip(messages, received_outputs,
+                                                                         decoded_outputs, success):
+                try:
+                    self.assertListEqual(list(message), list(coder.decode_output(received_output)))
+                    self.assertTrue(decoded)
+                    self.assertListEqual(list(message), list(decoded_output))
+                except CouldNotDecodeError:
+                    self.assertFalse(decoded)
+
+    def test_decodability(self):
+        coder = Polarcodes(0.5, 64, 16)
+        erasure_masks = np.random.random((40, 64)) < 0.5
+        decodable = coder.is_decodable_batch(erasure_masks)
+
+        for erasure_mask, expected in zip(erasure_masks, decodable):
+            received_output = coder.erase_bits(coder.encode_input([1] * 16), erasure_mask)
+
+            try:
+                coder.decode_output(received_output)
+                decoded = True
+            except CouldNotDecodeError:
+                decoded = False
+
+            self.assertEqual(decoded, expected)
+            self.assertEqual(decoded, coder.is_decodable(erasure_mask))
+
+    def test_ml_decoder(self):
+        coder = Polarcodes(0.5, 128, 64)
+
+        for _ in range(20):
+            message = np.random.randint(0, 2, size=64)
+            received_output = coder.simulate_bec_channel(coder.encode_input(message), true_random=True)
+
+            try:
+                decoded_output = coder.decode_output(received_output, decoder=Polarcodes.PEELING)
+            except CouldNotDecodeError:
+                decoded_output = None
+
+            try:
+                ml_output = coder.decode_output(received_output, decoder=Polarcodes.ML)
+            except CouldNotDecodeError:
+                # ML recovers at least every pattern peeling recovers
+                self.assertIsNone(decoded_output)
+                continue
+
+            self.assertListEqual(list(message), list(ml_output))
+            self.assertListEqual(list(message), list(coder.decode_output(received_output, decoder=Polarcodes.HYBRID)))
+
+    def test_fast_ssc_decoder(self):
+        coder = Polarcodes(0.4, 512, 256)
+        erasure_masks = np.random.random((20, 512)) < 0.3
+        decodable = coder.is_decodable_batch(erasure_masks)
+
+        for erasure_mask, expected in zip(erasure_masks, decodable):
+            message = np.random.randint(0, 2, size=256)
+            received_output = coder.erase_bits(coder.encode_input(message), erasure_mask)
+
+            if expected:
+                self.assertListEqual(list(message), list(coder.decode_output(received_output, decoder=Polarcodes.FAST_SSC)))
+
+    def test_compact_decoder(self):
+        coder = Polarcodes(0.5, 256, 64)
+
+        for _ in range(20):
+            message = np.random.randint(0, 2, size=64)
+            received_output = coder.simulate_bec_channel(coder.encode_input(message), true_random=True)
+
+            try:
+                decoded_output = coder.decode_output(received_output)
+            except CouldNotDecodeError:
+                self.assertRaises(CouldNotDecodeError, coder.decode_output, received_output,
+                                  decoder=Polarcodes.COMPACT)
+                continue
+
+            self.assertListEqual(list(decoded_output), list(coder.decode_output(received_output,
+                                                                                decoder=Polarcodes.COMPACT)))
+
+    def test_accelerated_backend(self):
+        coder = Polarcodes(0.5, 256, 64)
+        accelerated_coder = Polarcodes(0.5, 256, 64, accelerated=True)
+
+        messages = np.random.randint(0, 2, size=(20, 64))
+        self.assertTrue(np.array_equal(coder.encode_inputs(messages), accelerated_coder.encode_inputs(messages)))
+
+        for message in messages:
+            received_output = coder.simulate_bec_channel(coder.encode_input(message), true_random=True)
+
+            try:
+                decoded_output = coder.decode_output(received_output)
+            except CouldNotDecodeError:
+                self.assertRaises(CouldNotDecodeError, accelerated_coder.decode_output, received_output)
+                continue
+
+            self.assertListEqual(list(decoded_output), list(accelerated_coder.decode_output(received_output)))
+
+    def test_invalid_symbols(self):
+        received_output = Polarcodes(0.5, 64, 16).encode_input([1] * 16)
+        received_output[5] = 2
+
+        for systematic, accelerated in [(False, False), (True, False), (False, True)]:
+            coder = Polarcodes(0.5, 64, 16, systematic=systematic, accelerated=accelerated)
+
+            for decoder in [Polarcodes.NAIVE, Polarcodes.EFFICIENT, Polarcodes.PEELING, Polarcodes.ML,
+                            Polarcodes.HYBRID, Polarcodes.FAST_SSC, Polarcodes.COMPACT]:
+                self.assertRaises(InvalidCharacterInMessage, coder.decode_output, received_output, decoder=decoder)
+                self.assertRaises(InvalidCharacterInMessage, coder.decode_output, received_output.astype(np.int8),
+                                  decoder=decoder)
+
+            self.assertRaises(InvalidCharacterInMessage, coder.decode_outputs, received_output[np.newaxis])
+            self.assertRaises(InvalidCharacterInMessage, coder.decode_output_partial, received_output)
+            self.assertRaises(InvalidCharacterInMessage, list, coder.decode_output_stream(received_output))
+
+    def test_stream_decoding(self):
+        coder = Polarcodes(0.5, 256, 64)
+
+        for _ in range(20):
+            message = np.random.randint(0, 2, size=64)
+            received_output = coder.simulate_bec_channel(coder.encode_input(message), true_random=True)
+
+            try:
+                decoded_output = coder.decode_output(received_output)
+            except CouldNotDecodeError:
+                self.assertRaises(CouldNotDecodeError, list, coder.decode_output_stream(received_output))
+                continue
+
+            self.assertListEqual(list(decoded_output), list(coder.decode_output_stream(received_output)))
+
+            words = list(coder.decode_output_stream(received_output, word_size=24))
+            self.assertListEqual([24, 24, 16], [len(word) for word in words])
+            self.assertListEqual(list(decoded_output), list(np.concatenate(words)))
+
+    def test_partial_decoding(self):
+        coder = Polarcodes(0.5, 256, 128)
+
+        for _ in range(20):
+            message = np.random.randint(0, 2, size=128)
+            encoded_input = coder.encode_input(message)
+            received_output = coder.simulate_bec_channel(encoded_input, true_random=True)
+
+            result = coder.decode_output_partial(received_output)
+            n_decoded = len(result.decoded_output)
+            self.assertListEqual(list(message[:n_decoded]), list(result.decoded_output))
+
+            if result.complete:
+                self.assertEqual(0, len(result.retransmission_positions))
+                continue
+
+            self.assertEqual(coder.information_indices[n_decoded], result.stuck_index)
+
+            # Retransmitting the proposed bits has to be enough
+            positions = result.retransmission_positions
+            self.assertTrue(np.isnan(received_output[positions]).all())
+            received_output[positions] = encoded_input[positions]
+            self.assertListEqual(list(message), list(coder.decode_output(received_output)))
+
+    def test_construction_cache(self):
+        previous_directory = construction.get_cache_directory()
+
+        with tempfile.TemporaryDirectory() as directory:
+            construction.set_cache_directory(directory)
+
+            try:
+                z_parameters, a = construction.construct_code(0.3, 64, 32)
+                self.assertEqual(1, len(os.listdir(directory)))
+                self.assertFalse(z_parameters.flags.writeable)
+
+                # A new process would load the stored construction
+                construction.set_cache_directory(directory)
+                stored_z_parameters, stored_a = construction.construct_code(0.3, 64, 32)
+                self.assertTrue(np.array_equal(z_parameters, stored_z_parameters))
+                self.assertTrue(np.array_equal(a, stored_a))
+
+                # A stored construction of another blocklength is computed again
+                path = os.path.join(directory, os.listdir(directory)[0])
+                np.savez(path, z_parameters=z_parameters[:32], a=a[:32])
+                construction.set_cache_directory(directory)
+                recomputed_z_parameters, recomputed_a = construction.construct_code(0.3, 64, 32)
+                self.assertTrue(np.array_equal(z_parameters, recomputed_z_parameters))
+                self.assertTrue(np.array_equal(a, recomputed_a))
+            finally:
+                construction.set_cache_directory(previous_directory)
+
+    def test_reliability_sequence(self):
+        reliability_sequence = ReliabilitySequence(0.3, 1024)
+
+        for blocklength, k_information_bits in [(8, 4), (256, 128), (1024, 300)]:
+            coder = Polarcodes(0.3, blocklength, k_information_bits)
+            sequence_coder = Polarcodes(0.3, blocklength, k_information_bits,
+                                        reliability_sequence=reliability_sequence)
+
+            self.assertTrue(np.allclose(coder.z_parameters, sequence_coder.z_parameters))
+            self.assertListEqual(list(coder.information_indices), list(sequence_coder.information_indices))
+            self.assertListEqual(list(coder.information_indices),
+                                 list(reliability_sequence.information_set(blocklength, k_information_bits)))
+
+        # Exact bhattacharyya parameters as reference, where float64 ties or saturates
+        # (equal parameters are ordered by their channel index)
+        for epsilon in (Fraction(1, 2), Fraction(3, 10), Fraction(9, 10)):
+            z_parameters = [epsilon]
+            while len(z_parameters) < 1024:
+                z_parameters = [z for parent in z_parameters for z in (2 * parent - parent ** 2, parent ** 2)]
+
+            order = sorted(range(1024), key=lambda channel: z_parameters[channel])
+            self.assertListEqual(order, list(ReliabilitySequence(float(epsilon), 1024).order(1024)))
+
+            for k_information_bits in range(0, 1025, 1 if epsilon == Fraction(1, 2) else 31):
+                _, a = construction.construct_code(float(epsilon), 1024, k_information_bits)
+                self.assertListEqual(sorted(order[:k_information_bits]), list(np.flatnonzero(a)))
+
+        reliability_sequence = ReliabilitySequence(0.5, 1024)
+
+        self.assertListEqual(list(Polarcodes(0.5, 256, 241).information_indices),
+                             list(Polarcodes(0.5, 256, 241, reliability_sequence=reliability_sequence)
+                                  .information_indices))
+
+    def test_shared_code_descriptor(self):
+        coder = Polarcodes.shared(0.3, 128, 64)
+
+        self.assertIs(coder, Polarcodes.shared(0.3, 128, 64))
+        self.assertIsNot(coder, Polarcodes.shared(0.3, 128, 64, systematic=True))
+        self.assertIs(coder.descriptor, Polarcodes(0.3, 128, 64).descriptor)
+
+        self.assertFalse(coder.descriptor.information_mask.flags.writeable)
+        self.assertFalse(coder.descriptor.frozen_bits_expanded.flags.writeable)
+        self.assertEqual(np.bool_, coder.descriptor.information_mask.dtype)
+
+        message = np.random.randint(0, 2, size=64)
+        self.assertListEqual(list(message), list(coder.decode_output(coder.encode_input(message))))
+
+    def test_rate_matching(self):
+        for rate_matching in [Polarcodes.SHORTENING, Polarcodes.PUNCTURING]:
+            coder = Polarcodes(0.25, 96, 32, rate_matching=rate_matching)
+
+            self.assertEqual(96, coder.blocklength)
+            self.assertEqual(128, coder.mother_blocklength)
+
+            messages = np.random.randint(0, 2, size=(20, 32))
+            encoded_inputs = coder.encode_inputs(messages)
+            self.assertEqual((20, 96), encoded_inputs.shape)
+            self.assertTrue(np.array_equal(encoded_inputs, coder.unpack_encoded(coder.encode_inputs_packed(messages))))
+
+            received_outputs = np.array([coder.simulate_bec_channel(encoded_input, true_random=True)
+                                         for encoded_input in encoded_inputs])
+            decoded_outputs, success = coder.decode_outputs(received_outputs)
+            self.assertListEqual(list(success), list(coder.is_decodable_batch(np.isnan(received_outputs))))
+
+            for message, received_output, decoded_output, decoded in zip(messages, received_outputs,
+                                                                          decoded_outputs, success):
+                if not decoded:
+                    self.assertRaises(CouldNotDecodeError, coder.decode_output, received_output)
+                    continue
+
+                self.assertListEqual(list(message), list(decoded_output))
+                self.assertListEqual(list(message), list(coder.decode_output(received_output)))
+
+    def test_batch_channel_simulation(self):
+        coder = Polarcodes(0.25, 128, 64)
+        encoded_inputs = coder.encode_inputs(np.random.randint(0, 2, size=(50, 64)))
+
+        masks = coder.erasure_masks(50, rng=1)
+        self.assertEqual((50, 128), masks.shape)
+        self.assertTrue((masks.sum(axis=1) == 32).all())
+        self.assertTrue(np.array_equal(masks, coder.erasure_masks(50, rng=1)))
+
+        out = np.empty((50, 128))
+        received_outputs = coder.simulate_bec_channels(encoded_inputs, true_random=True, out=out)
+        self.assertIs(out, received_outputs)
+
+        erased = np.isnan(received_outputs)
+        self.assertTrue(np.array_equal(encoded_inputs[~erased], received_outputs[~erased]))
+
+    def test_compact_bits(self):
+        for coder in (Polarcodes(0.25, 128, 64), Polarcodes(0.25, 96, 40, accelerated=True)):
+            messages = np.random.randint(0, 2, size=(20, 40 if coder.accelerated else 64))
+
+            encoded_inputs = coder.encode_inputs(messages.astype(np.int8))
+            self.assertEqual(np.int8, encoded_inputs.dtype)
+            self.assertTrue(np.array_equal(coder.encode_inputs(messages), encoded_inputs))
+
+            received_outputs = coder.simulate_bec_channels(encoded_inputs, rng=2)
+            self.assertEqual(np.int8, received_outputs.dtype)
+            self.assertTrue(np.array_equal(to_ternary(coder.simulate_bec_channels(encoded_inputs.astype(float),
+                                                                                  rng=2)), received_outputs))
+
+            decoded_outputs, success = coder.decode_outputs(received_outputs)
+            self.assertEqual(np.int8, decoded_outputs.dtype)
+            self.assertTrue(np.array_equal(messages[success], decoded_outputs[success]))
+
+            for message, received_output in zip(messages, received_outputs):
+                for decoder in (Polarcodes.EFFICIENT, Polarcodes.PEELING, Polarcodes.FAST_SSC, Polarcodes.COMPACT):
+                    try:
+                        decoded_output = coder.decode_output(received_output, decoder=decoder)
+                    except CouldNotDecodeError:
+                        continue
+
+                    self.assertEqual(np.int8, decoded_output.dtype)
+                    self.assertListEqual(list(message), list(decoded_output))
+
+            # Unsigned words (e.g. unpacked codewords) have no erasures, a wrapped ERASED is no bit
+            unsigned_output = encoded_inputs[0].astype(np.uint8)
+            for decoder in (Polarcodes.EFFICIENT, Polarcodes.PEELING, Polarcodes.FAST_SSC, Polarcodes.COMPACT):
+                decoded_output = coder.decode_output(unsigned_output, decoder=decoder)
+                self.assertEqual(np.int8, decoded_output.dtype)
+                self.assertListEqual(list(messages[0]), list(decoded_output))
+
+                unsigned_output[1] = 255
+                self.assertRaises(InvalidCharacterInMessage, coder.decode_output, unsigned_output, decoder=decoder)
+                unsigned_output[1] = encoded_inputs[0][1]
+
+    def test_bursty_channel(self):
+        channel = GilbertElliottChannel.from_burst_statistics(0.1, 16)
+        self.assertAlmostEqual(0.1, channel.erasure_rate)
+
+        masks = channel.erasure_masks(1000, 1024, rng=3)
+        self.assertAlmostEqual(0.1, masks.mean(), 2)
+        self.assertTrue(np.array_equal(masks, channel.erasure_masks(1000, 1024, rng=3)))
+
+        # An erasure rate above L / (1 + L) for bursts of L bits needs p_good_to_bad above 1
+        self.assertRaises(AssertionError, GilbertElliottChannel.from_burst_statistics, 0.6, 1)
+
+        # Interleaving restores the codewords, the erasures follow the channel uses
+        coder = Polarcodes(0.25, 256, 96)
+        encoded_inputs = coder.encode_inputs(np.random.randint(0, 2, size=(64, 96)))
+        self.assertTrue(np.array_equal(encoded_inputs, deinterleave_blocks(interleave_blocks(encoded_inputs, 8), 8)))
+
+        received_outputs = coder.simulate_channel(encoded_inputs, channel, interleaving_depth=8, rng=4)
+        masks = coder.channel_erasure_masks(64, channel, interleaving_depth=8, rng=4)
+        self.assertTrue(np.array_equal(masks, np.isnan(received_outputs)))
+        self.assertTrue(np.array_equal(channel.erasure_masks(64, 256, rng=4), interleave_blocks(masks, 8)))
+
+        # Bursts are spread over the codewords
+        plain = coder.is_decodable_batch(coder.channel_erasure_masks(4096, channel, rng=5)).mean()
+        interleaved = coder.is_decodable_batch(coder.channel_erasure_masks(4096, channel, 16, rng=5)).mean()
+        self.assertGreater(interleaved, plain)
+
+    def test_importance_sampling(self):
+        # All erasure patterns of N = 16 are enumerated, the estimate is exact
+        coder = Polarcodes(0.2, 16, 8)
+        masks = ((np.arange(2 ** 16)[:, np.newaxis] >> np.arange(16)) & 1).astype(bool)
+        n_erased = masks.sum(axis=1)
+        probabilities = 0.2 ** n_erased * 0.8 ** (16 - n_erased)
+        block_error_rate = probabilities[~coder.is_decodable_batch(masks)].sum()
+
+        estimate = estimate_block_error_rate_stratified(coder)
+        self.assertAlmostEqual(block_error_rate, estimate.block_error_rate)
+        self.assertEqual(0, estimate.standard_error)
+
+        # Both estimators agree with brute force
+        coder = Polarcodes(0.3, 64, 24)
+        block_error_rate = 1 - coder.is_decodable_batch(coder.erasure_masks(400000, True, rng=6)).mean()
+
+        for estimate in (estimate_block_error_rate_stratified(coder, rng=7),
+                         estimate_block_error_rate_biased(coder, n_samples=40000, rng=8)):
+            self.assertLess(abs(estimate.block_error_rate - block_error_rate), 4 * estimate.standard_error + 5e-4)
+            self.assertLess(estimate.relative_error, 0.2)
+
+    def test_analytic_block_error_rate(self):
+        coder = Polarcodes(0.3, 64, 24)
+        bounds = coder.analytic_block_error_rate()
+        block_error_rate = 1 - coder.is_decodable_batch(coder.erasure_masks(200000, True, rng=9)).mean()
+
+        self.assertLessEqual(bounds.lower_bound, bounds.estimate)
+        self.assertLessEqual(bounds.estimate, bounds.union_bound)
+        self.assertLess(bounds.lower_bound, block_error_rate)
+        self.assertAlmostEqual(block_error_rate, bounds.estimate, delta=1e-3)
+
+        # Other erasure rates keep the information set, rate matched codes include the punctured bits
+        self.assertLess(coder.analytic_block_error_rate(0.2).estimate, bounds.estimate)
+        self.assertEqual(1., coder.analytic_block_error_rate(1.).estimate)
+
+        coder = Polarcodes(0.3, 48, 16, rate_matching=Polarcodes.PUNCTURING)
+        block_error_rate = 1 - coder.is_decodable_batch(coder.erasure_masks(200000, True, rng=10)).mean()
+        self.assertAlmostEqual(block_error_rate, coder.analytic_block_error_rate(0.3).estimate, delta=2e-3)
+
 
 if __name__ == '__main__':
     unittest.main()
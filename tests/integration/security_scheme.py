@@ -0,0 +1,157 @@
+import random
+import unittest
+
+import numpy as np
+
+from app.cipher.block_cipher import BlockCipher
+from app.cipher.exceptions.exceptions import InvalidPadding
+from app.cipher.helper import bits_to_hex
+from app.polarcodes.exceptions.exceptions import CouldNotDecodeError
+from app.polarcodes.helper import ERASED
+from app.security_scheme import Scheme
+
+
+class TestSecurityScheme(unittest.TestCase):
+    def test_transmission(self):
+        rng = np.random.default_rng(3)
+        scheme = Scheme(BlockCipher.SPECK, 96, 128, 0.25, 256)
+        scheme.set_key(list(rng.integers(0, 2, size=96)))
+
+        for _ in range(3):
+            message = [int(i) for i in rng.integers(0, 2, size=128)]
+            encoded_message = scheme.encode(message)
+
+            self.assertListEqual(message, scheme.decode(encoded_message))
+            scheme.successfully_transmitted()
+
+    def test_stream_decoding(self):
+        rng = np.random.default_rng(1)
+        scheme = Scheme(BlockCipher.DES, 64, 128, 0.25, 256)
+        scheme.set_key(list(rng.integers(0, 2, size=64)))
+
+        message = [int(i) for i in rng.integers(0, 2, size=128)]
+        blocks = list(scheme.decode_stream(scheme.encode(message)))
+
+        self.assertEqual(2, len(blocks))
+        self.assertListEqual(message, blocks[0] + blocks[1])
+
+    def test_rate_matched_bec_block(self):
+        rng = np.random.default_rng(4)
+        scheme = Scheme(BlockCipher.DES, 64, 64, 0.25, 192)
+        scheme.set_key(list(rng.integers(0, 2, size=64)))
+
+        message = [int(i) for i in rng.integers(0, 2, size=64)]
+        encoded_message = scheme.encode(message)
+
+        self.assertEqual(144, len(encoded_message))
+        self.assertListEqual(message, scheme.decode(encoded_message))
+
+    def test_interleaving(self):
+        rng = np.random.default_rng(2)
+        scheme = Scheme(BlockCipher.DES, 64, 64, 0.25, 128, interleaving_depth=8)
+        scheme.set_key(list(rng.integers(0, 2, size=64)))
+
+        message = [int(i) for i in rng.integers(0, 2, size=64)]
+        encoded_message = scheme.encode(message)
+
+        self.assertEqual(96, len(encoded_message))
+        self.assertListEqual(message, scheme.decode(encoded_message))
+
+    def test_nan_erasures(self):
+        rng = np.random.default_rng(6)
+        scheme = Scheme(BlockCipher.DES, 64, 64, 0.25, 128)
+        scheme.set_key(list(rng.integers(0, 2, size=64)))
+
+        # Bits erased on the link are NaN in float messages, ERASED in compact ones
+        messages = rng.integers(0, 2, size=(4, 64))
+        received_messages = scheme.encode_many(messages).astype(float)
+        received_messages[:, [5, 40, 77]] = np.nan
+
+        decoded_messages, success = scheme.decode_many(received_messages)
+        self.assertTrue(success.all())
+        self.assertTrue(np.array_equal(messages, decoded_messages))
+        self.assertListEqual([int(bit) for bit in messages[0]], scheme.decode(received_messages[0]))
+
+    def test_bec_positions(self):
+        scheme = Scheme(BlockCipher.DES, 64, 64, 0.25, 128)
+        key = list(np.random.randint(0, 2, size=64))
+        scheme.set_key(key)
+
+        for n_transmitted_messages in range(3):
+            # Same erasure pattern as shuffling the booleans themselves
+            positions = [True] * 32 + [False] * 96
+            random.Random(bits_to_hex(key) + n_transmitted_messages).shuffle(positions)
+
+            self.assertListEqual(positions, list(scheme.get_bec_positions(key)))
+            scheme.successfully_transmitted()
+
+        # The positions are cached per scheme and counter, a new key drops them
+        scheme.set_key([1 - bit for bit in key])
+        erasure_mask, _, _ = scheme._bec_positions()
+        self.assertListEqual(list(scheme.get_bec_positions([1 - bit for bit in key])), list(erasure_mask))
+
+    def test_batch_transmission(self):
+        scheme = Scheme(BlockCipher.DES, 64, 128, 0.25, 256)
+        scheme.set_key(list(np.random.randint(0, 2, size=64)))
+        scheme.successfully_transmitted()
+
+        messages = np.random.randint(0, 2, size=(10, 128))
+        encoded_messages = scheme.encode_many(messages)
+        decoded_messages, success = scheme.decode_many(encoded_messages, start=1)
+
+        self.assertEqual((10, 192), encoded_messages.shape)
+        self.assertTrue(np.array_equal(messages[success], decoded_messages[success]))
+
+        # Same as sending the messages one by one
+        for message, encoded_message in zip(messages, encoded_messages):
+            self.assertListEqual(list(scheme.encode(list(message))), list(encoded_message))
+            scheme.successfully_transmitted()
+
+        scheme.successfully_transmitted(5)
+        self.assertTrue(np.array_equal(encoded_messages[5:], scheme.encode_many(messages[5:], start=6)))
+        self.assertTrue(np.array_equal(scheme.encode_many(messages[:1]), scheme.encode_many(messages[:1], start=16)))
+
+    def test_byte_stream(self):
+        rng = np.random.default_rng(0)
+        key = [int(i) for i in rng.integers(0, 2, size=64)]
+        sender = Scheme(BlockCipher.DES, 64, 128, 0.1, 256)
+        receiver = Scheme(BlockCipher.DES, 64, 128, 0.1, 256)
+        sender.set_key(key)
+        receiver.set_key(key)
+
+        data = rng.integers(0, 256, size=3001, dtype=np.uint8).tobytes()
+        chunks = (data[i:i + 333] for i in range(0, len(data), 333))
+
+        frames = list(sender.encode_byte_stream(chunks, batch_size=32))
+        self.assertEqual(188, len(frames))
+        self.assertListEqual(list(range(188)), [counter for counter, _ in frames])
+
+        self.assertEqual(data, b''.join(receiver.decode_byte_stream(iter(frames), batch_size=50)))
+        self.assertEqual(188, receiver._n_transmitted_messages)
+
+        # The bec positions of transmitted messages are not kept
+        self.assertEqual({}, sender._bec_positions_cache)
+        self.assertEqual({}, receiver._bec_positions_cache)
+
+        # The next stream continues with the message counters
+        frames = list(sender.encode_byte_stream([b'']))
+        self.assertEqual([188], [counter for counter, _ in frames])
+        self.assertEqual(b'', b''.join(receiver.decode_byte_stream(frames)))
+
+        # A truncated stream misses the padding
+        frames = list(sender.encode_byte_stream([data]))
+        with self.assertRaises(InvalidPadding):
+            b''.join(receiver.decode_byte_stream(frames[:-1]))
+
+        # A frame that cannot be decoded stops the counter at its message
+        frames = list(sender.encode_byte_stream([data[:200]]))
+        counter, encoded_message = frames[5]
+        frames[5] = (counter, np.full(len(encoded_message), ERASED, dtype=np.int8))
+
+        with self.assertRaises(CouldNotDecodeError):
+            b''.join(receiver.decode_byte_stream(frames, batch_size=4))
+        self.assertEqual(counter, receiver._n_transmitted_messages)
+
+
+if __name__ == '__main__':
+    unittest.main()